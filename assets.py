@@ -0,0 +1,104 @@
+import hashlib
+import os
+import struct
+
+import pygame
+
+# Общий кэш картинок для всех уровней.
+# В памяти ключ — (хэш содержимого файла, размер, сглаживание, режим конвертации),
+# поэтому одинаковые файлы декодируются, масштабируются и конвертируются один раз.
+# Декодированные и отмасштабированные пиксели дополнительно лежат на диске,
+# и при следующем запуске PNG/WebP не распаковываются заново.
+CACHE_DIR = os.path.join("cache", "assets")
+DISK_CACHE = True
+CACHE_MAGIC = b"LBA2"
+# Заголовок файла кэша: магия, ширина, высота, формат пикселей, есть ли colorkey и сам colorkey (RGBA).
+# Картинки с палитрой (PNG/GIF с прозрачным цветом) хранят прозрачность в colorkey, а не в альфа-канале
+HEADER = struct.Struct("<4sII4s?4B")
+
+_digests = {}
+_surfaces = {}
+
+
+def digest(path):
+    if path not in _digests:
+        with open(path, "rb") as file:
+            _digests[path] = hashlib.sha1(file.read()).hexdigest()
+    return _digests[path]
+
+
+def _cache_path(path, size, smooth):
+    key = hashlib.sha1(f"{digest(path)}:{size}:{smooth}".encode()).hexdigest()
+    return os.path.join(CACHE_DIR, key + ".bin")
+
+
+def _read_cache(cache_path):
+    with open(cache_path, "rb") as file:
+        data = file.read()
+    if data[:4] != CACHE_MAGIC:
+        return None
+    _, width, height, pixel_format, has_colorkey, *colorkey = HEADER.unpack_from(data)
+    surface = pygame.image.frombytes(data[HEADER.size:], (width, height), pixel_format.rstrip(b"\0").decode())
+    if has_colorkey:
+        surface.set_colorkey(colorkey)
+    return surface
+
+
+def _write_cache(cache_path, surface):
+    pixel_format = "RGBA" if surface.get_flags() & pygame.SRCALPHA else "RGB"
+    colorkey = surface.get_colorkey()
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(cache_path + ".tmp", "wb") as file:
+        file.write(HEADER.pack(CACHE_MAGIC, *surface.get_size(), pixel_format.encode(),
+                               colorkey is not None, *(colorkey or (0, 0, 0, 0))))
+        file.write(pygame.image.tobytes(surface, pixel_format))
+    os.replace(cache_path + ".tmp", cache_path)
+
+
+# Картинка после декодирования и масштабирования, но без конвертации под экран
+def _decode(path, size, smooth):
+    cache_path = _cache_path(path, size, smooth)
+    if DISK_CACHE and os.path.exists(cache_path):
+        surface = _read_cache(cache_path)
+        if surface is not None:
+            return surface
+
+    surface = pygame.image.load(path)
+    if size is not None:
+        scale = pygame.transform.smoothscale if smooth else pygame.transform.scale
+        surface = scale(surface, size)
+    if DISK_CACHE:
+        _write_cache(cache_path, surface)
+    return surface
+
+
+# convert: "auto" — convert_alpha() для картинок с прозрачностью, иначе convert();
+# "alpha" и "opaque" — принудительно; None — без конвертации
+def image(path, size=None, smooth=False, convert="auto"):
+    key = (digest(path), size, smooth, convert)
+    surface = _surfaces.get(key)
+    if surface is not None:
+        return surface
+
+    raw_key = (digest(path), size, smooth, None)
+    raw = _surfaces.get(raw_key)
+    if raw is None:
+        raw = _surfaces[raw_key] = _decode(path, size, smooth)
+    if convert is None or pygame.display.get_surface() is None:
+        # окна ещё нет — конвертировать не во что
+        return raw
+
+    if convert == "alpha" or (convert == "auto" and raw.get_flags() & pygame.SRCALPHA):
+        surface = raw.convert_alpha()
+    else:
+        surface = raw.convert()
+    _surfaces[key] = surface
+    return surface
+
+
+# Кадры ходьбы героя из sprites/ (одни и те же для всех трёх уровней)
+def walk_frames(size=None, smooth=False, convert="auto"):
+    frames = {direction: [image(f"sprites/{direction}{i}.png", size, smooth, convert) for i in range(1, 5)]
+              for direction in ("right", "left", "up", "down")}
+    frames["stand"] = image("sprites/down1.png", size, smooth, convert)
+    return frames
@@ -0,0 +1,126 @@
+# Пропускная способность входа при одновременных логинах: connect() на каждый запрос против пула storage.Store.
+# Часть потоков параллельно регистрирует новых пользователей — так видно блокировки между чтением и записью.
+# bcrypt по умолчанию с минимальной стоимостью, чтобы мерить базу, а не хэширование (--rounds 0 — без bcrypt).
+# Запуск из корня проекта: python benchmarks/bench_auth.py --threads 1 4 16
+import argparse
+import itertools
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+import bcrypt
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import storage  # noqa: E402
+
+USERS = 1000
+
+
+# Старый способ из main1: новое соединение и режим журнала по умолчанию на каждый вызов
+class ConnectPerCall:
+    def __init__(self, path):
+        self.path = path
+        conn = sqlite3.connect(path)
+        conn.execute(storage.MIGRATIONS[0])
+        conn.commit()
+        conn.close()
+
+    def add_user(self, username, password_hash):
+        conn = sqlite3.connect(self.path)
+        try:
+            conn.execute(storage.INSERT_USER, (username, password_hash))
+            conn.commit()
+            return True
+        except sqlite3.IntegrityError:
+            return False
+        finally:
+            conn.close()
+
+    def password_hash(self, username):
+        conn = sqlite3.connect(self.path)
+        row = conn.execute(storage.SELECT_PASSWORD, (username,)).fetchone()
+        conn.close()
+        return row[0] if row else None
+
+    def close(self):
+        pass
+
+
+def make_hash(password, rounds):
+    if not rounds:
+        return password
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+def check(stored_hash, password, rounds):
+    if not rounds:
+        return stored_hash == password
+    return bcrypt.checkpw(password, stored_hash)
+
+
+def run(store_class, threads, seconds, write_share, rounds):
+    # папка с базой удаляется после замера (и при выходе, если замер упал)
+    directory = tempfile.TemporaryDirectory()
+    store = store_class(os.path.join(directory.name, "users.db"))
+    password = b"password123"
+    stored = make_hash(password, rounds)
+    for index in range(USERS):
+        store.add_user(f"user{index}", stored)
+
+    counter = itertools.count(USERS)
+    stop = time.perf_counter() + seconds
+    counts = [[0, 0, 0] for _ in range(threads)]  # входы, регистрации, ошибки
+
+    def worker(number):
+        row = counts[number]
+        writes = 0
+        while time.perf_counter() < stop:
+            try:
+                # каждая write_share-я операция — регистрация, остальные — вход
+                if write_share and (row[0] + row[1]) * write_share >= writes + 1:
+                    store.add_user(f"user{next(counter)}", make_hash(password, rounds))
+                    writes += 1
+                    row[1] += 1
+                else:
+                    name = f"user{(row[0] * 7919 + number) % USERS}"
+                    assert check(store.password_hash(name), password, rounds)
+                    row[0] += 1
+            except sqlite3.OperationalError:
+                row[2] += 1
+
+    pool = [threading.Thread(target=worker, args=(number,)) for number in range(threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    store.close()
+    directory.cleanup()
+    logins, registrations, errors = (sum(column) for column in zip(*counts))
+    return logins / elapsed, registrations / elapsed, errors
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--seconds", type=float, default=2.0, help="длительность одного замера")
+    parser.add_argument("--writes", type=float, default=0.1, help="доля регистраций среди запросов")
+    parser.add_argument("--rounds", type=int, default=4, help="стоимость bcrypt (0 — без хэширования)")
+    args = parser.parse_args()
+
+    print(f"{USERS} пользователей, регистраций {args.writes:.0%}, bcrypt rounds {args.rounds or '-'}")
+    print(f"{'потоков':>8} {'хранилище':>14} {'входов/с':>10} {'регистр./с':>11} {'locked':>7}")
+    for threads in args.threads:
+        for name, store_class in (("connect", ConnectPerCall), ("Store", storage.Store)):
+            logins, registrations, errors = run(store_class, threads, args.seconds, args.writes, args.rounds)
+            print(f"{threads:>8} {name:>14} {logins:10.0f} {registrations:11.0f} {errors:7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+# Пропускная способность генераторов лабиринта (клеток в секунду)
+# Запуск из корня проекта: python benchmarks/bench_generation.py --sizes 101 501 1001
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import mazegen  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[101, 501, 1001])
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--stream", type=int, default=0, help="сторона лабиринта для потоковой записи Эллером")
+    args = parser.parse_args()
+
+    print(f"{'алгоритм':>12} {'размер':>11} {'сек':>8} {'клеток/с':>12}")
+    for size in args.sizes:
+        for name in mazegen.ALGORITHMS:
+            start = time.perf_counter()
+            mazegen.generate(size, size, name, args.seed)
+            elapsed = time.perf_counter() - start
+            print(f"{name:>12} {size:>5}x{size:<5} {elapsed:8.3f} {size * size / elapsed:12.0f}")
+
+    if args.stream:
+        with tempfile.TemporaryDirectory() as directory:
+            start = time.perf_counter()
+            mazegen.save_eller(os.path.join(directory, "maze.raw"), args.stream, args.stream, args.seed)
+            elapsed = time.perf_counter() - start
+        print(f"{'eller-файл':>12} {args.stream:>5}x{args.stream:<5} {elapsed:8.3f} "
+              f"{args.stream ** 2 / elapsed:12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# Стоимость кадра при росте числа монстров: общее поле расстояний против BFS у каждого монстра
+# Запуск из корня проекта: python benchmarks/bench_monsters.py --size 101
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import main3  # noqa: E402
+import pathfinding  # noqa: E402
+
+
+def run(count, frames, path_finder):
+    random.seed(1)
+    field = pathfinding.DistanceField(main3.get_maze())
+    hero = main3.Hero(1, 1)
+    free_cells = main3.get_maze().open_cells((main3.FLOOR,))
+    monsters = [main3.Monster(*random.choice(free_cells), path_finder=path_finder) for _ in range(count)]
+    for monster in monsters:
+        monster.frame_counter = random.randrange(monster.move_delay)
+
+    start = time.perf_counter()
+    for frame in range(frames):
+        if frame % hero.move_delay == 0:
+            dx, dy = random.choice(pathfinding.DIRECTIONS)
+            hero.move(dx, dy)
+        field.set_goal(hero.x, hero.y)
+        field.update()
+        for monster in monsters:
+            monster.move(hero, field)
+    return (time.perf_counter() - start) / frames * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=0, help="сторона лабиринта (по умолчанию — лабиринт из main3)")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--bfs-limit", type=int, default=100, help="максимум монстров для замера с BFS")
+    args = parser.parse_args()
+
+    if args.size:
+        main3.MAZE_WIDTH = main3.MAZE_HEIGHT = args.size | 1
+        main3.maze = main3.generate_maze(main3.MAZE_WIDTH, main3.MAZE_HEIGHT)
+
+    print(f"лабиринт {main3.MAZE_WIDTH}x{main3.MAZE_HEIGHT}, {args.frames} кадров")
+    print(f"{'монстров':>9} {'поле, мс/кадр':>14} {'bfs, мс/кадр':>13}")
+    for count in (1, 10, 100, 1000):
+        shared = run(count, args.frames, None)
+        single = f"{run(count, args.frames, pathfinding.bfs):13.3f}" if count <= args.bfs_limit else f"{'-':>13}"
+        print(f"{count:>9} {shared:14.3f} {single}")
+
+
+if __name__ == "__main__":
+    main()
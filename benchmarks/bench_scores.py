@@ -0,0 +1,85 @@
+# Таблица рекордов на большой базе: скорость пакетной записи партий и запросов top-N, лучших результатов и истории.
+# Запуск из корня проекта: python benchmarks/bench_scores.py --runs 1000000
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import storage  # noqa: E402
+
+TICK_RATES = {1: 20, 2: 30, 3: 30}
+
+
+def fill(store, users, runs, rng):
+    user_ids = []
+    for index in range(users):
+        store.add_user(f"user{index}", b"-")
+        user_ids.append(store.user_id(f"user{index}"))
+    now = time.time()
+    start = time.perf_counter()
+    batch = []
+    for index in range(runs):
+        level = rng.randint(1, 3)
+        result = "win" if rng.random() < 0.3 else "loss"
+        batch.append((rng.choice(user_ids), level, result, rng.randint(200, 20000) / TICK_RATES[level],
+                      rng.randint(0, 3) if level == 2 else 0, now + index))
+        if len(batch) == storage.BATCH_SIZE:
+            store.add_runs(batch)
+            batch = []
+    if batch:
+        store.add_runs(batch)
+    return runs / (time.perf_counter() - start), user_ids
+
+
+def timed(function, calls):
+    times = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=1000000, help="партий в базе")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--calls", type=int, default=200, help="повторов каждого запроса")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    # папка с базой удаляется в конце (и при выходе, если замер упал)
+    directory = tempfile.TemporaryDirectory()
+    store = storage.Store(os.path.join(directory.name, "scores.db"))
+    rate, user_ids = fill(store, args.users, args.runs, rng)
+    print(f"{args.runs} партий, {args.users} игроков: запись {rate:.0f} партий/с пачками по {storage.BATCH_SIZE}")
+
+    with store.connection() as conn:
+        plan = conn.execute("EXPLAIN QUERY PLAN " + storage.SELECT_LEADERBOARD, (1, 10)).fetchall()
+    print("план top-N:", "; ".join(row[-1] for row in plan))
+
+    print(f"{'запрос':<28} {'мс (медиана)':>12}")
+    for limit in (10, 100):
+        ms = timed(lambda: store.leaderboard(rng.randint(1, 3), limit), args.calls)
+        print(f"{f'leaderboard top-{limit}':<28} {ms:12.3f}")
+    print(f"{'bests игрока':<28} {timed(lambda: store.bests(rng.choice(user_ids)), args.calls):12.3f}")
+    ms = timed(lambda: store.history(rng.choice(user_ids), rng.randint(1, 3)), args.calls)
+    print(f"{'history игрока':<28} {ms:12.3f}")
+
+    # Со стороны игрового цикла запись партии — только put в очередь
+    writer = storage.RunWriter(store)
+    run = (user_ids[0], 1, "win", 10.0, 0, time.time())
+    print(f"{'RunWriter.submit':<28} {timed(lambda: writer.submit(run), args.calls):12.4f}")
+    writer.close()
+    store.close()
+    directory.cleanup()
+
+
+if __name__ == "__main__":
+    main()
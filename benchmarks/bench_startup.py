@@ -0,0 +1,62 @@
+# Время до появления окна авторизации по сравнению с голым запуском Qt.
+# База пользователей для замера создаётся во временной папке, task_manager.db проекта не трогается
+# Запуск из корня проекта: python benchmarks/bench_startup.py --runs 10
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BARE_QT = """
+import time
+start = time.perf_counter()
+from PyQt6.QtWidgets import QApplication, QDialog
+app = QApplication([])
+dialog = QDialog()
+print(time.perf_counter() - start)
+"""
+
+# sys.argv[1] — путь к временной базе
+AUTH_WINDOW = """
+import sys, time
+start = time.perf_counter()
+import main1
+main1.storage.DB_NAME = sys.argv[1]
+app = main1.QApplication([])
+main1.init_db()
+dialog = main1.AuthDialog()
+elapsed = time.perf_counter() - start
+loaded = [name for name in ("level1", "main2", "main3", "pygame", "numpy") if name in sys.modules]
+assert not loaded, f"до окна входа загружены {loaded}"
+print(elapsed)
+"""
+
+
+def measure(code, runs, *args):
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    times = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", code, *args], cwd=ROOT, env=env, check=True,
+                                capture_output=True, text=True).stdout
+        times.append(float(output.split()[-1]) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    bare = measure(BARE_QT, args.runs)
+    with tempfile.TemporaryDirectory() as directory:
+        auth = measure(AUTH_WINDOW, args.runs, os.path.join(directory, "users.db"))
+    print(f"голый Qt:           {bare:8.1f} мс")
+    print(f"окно авторизации:   {auth:8.1f} мс")
+    print(f"накладные расходы:  {auth - bare:8.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
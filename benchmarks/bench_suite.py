@@ -0,0 +1,336 @@
+# Набор замеров для проверки перед релизом: генерация, поиск пути, отрисовка, столкновения, загрузка карт.
+# Работает без окна (SDL dummy), результаты пишутся в JSON и сравниваются с сохранённым эталоном.
+# Запуск из корня проекта:
+#   python benchmarks/bench_suite.py --update-baseline     — записать эталон на этой машине
+#   python benchmarks/bench_suite.py                       — сравнить с эталоном (код 1 при регрессии, 2 — эталона нет)
+# Эталон в репозиторий не кладётся: абсолютные времена имеют смысл только на той машине, где сняты.
+# Проверка в CI: на базовой ревизии --update-baseline, затем на проверяемой — сравнение, на одной и той же машине.
+# Эталон пересчитывается на общий сдвиг скорости машины (медиана отношений по всем замерам прогона): так общая
+# загрузка машины не даёт ложных регрессий, а замедление отдельных замеров видно. Равномерное замедление всего набора
+# этим не ловится. Замеры короче MIN_GATED_MS только печатаются — в них шум больше порога
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pygame  # noqa: E402
+
+import main3  # noqa: E402
+import pathfinding  # noqa: E402
+import replay  # noqa: E402
+
+BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+# Во сколько раз замер может быть медленнее эталона, прежде чем считается регрессией
+THRESHOLD = 1.25
+# Сколько секунд длится как минимум один прогон замера (вызовы повторяются, пока не наберётся)
+MIN_RUN_SECONDS = 0.5
+# Замеры быстрее этого (мс на вызов в эталоне) в проверку не входят
+MIN_GATED_MS = 1.0
+# По скольким замерам как минимум считается общий сдвиг скорости (с -k их может быть меньше — тогда без пересчёта)
+MIN_DRIFT_CASES = 5
+# Сколько раз перемерить замер, вышедший за порог: регрессия засчитывается, только если держится во всех попытках
+RETRIES = 2
+# Временные файлы замеров (карты уровней); папка удаляется при выходе
+TEMP_DIR = tempfile.TemporaryDirectory()
+RESOLUTIONS = {"720p": (1280, 720), "1080p": (1920, 1080), "4k": (3840, 2160)}
+
+CASES = {}
+
+
+def case(name):
+    def register(function):
+        CASES[name] = function
+        return function
+    return register
+
+
+def timed(step, number):
+    start = time.perf_counter()
+    for _ in range(number):
+        step()
+    return time.perf_counter() - start
+
+
+# Замер: setup() готовит состояние один раз, возвращаемая им функция вызывается number раз за прогон.
+# number удваивается, пока прогон не займёт MIN_RUN_SECONDS: быстрые замеры крутим дольше, чтобы не мерить шум таймера.
+# Результат — лучший из repeat прогонов, мс на вызов: медленные прогоны — это помехи от других процессов, а не код
+def measure(setup, repeat):
+    with contextlib.redirect_stdout(io.StringIO()):
+        step = setup()
+    number = 1
+    while timed(step, number) < MIN_RUN_SECONDS:
+        number *= 2
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            step()
+        runs.append((time.perf_counter() - start) / number * 1000)
+    return {"ms": min(runs), "runs": runs}
+
+
+def generation_case(width, height):
+    def setup():
+        seeds = iter(range(10 ** 9))
+        return lambda: main3.generate_maze(width, height, seed=next(seeds))
+    return setup
+
+
+for size in ((39, 19), (101, 101), (501, 501)):
+    case(f"generate_maze {size[0]}x{size[1]}")(generation_case(*size))
+
+
+# Худший случай для поиска пути: лабиринт-«змейка» из длинных коридоров, цель в дальнем углу
+def bfs_case(size):
+    def setup():
+        grid = main3.generate_maze(size, size, "backtracker", seed=1)
+        monster = main3.Monster(size - 2, size - 2, grid=grid)
+        return lambda: monster.bfs((monster.x, monster.y), (1, 1))
+    return setup
+
+
+def field_case(size):
+    def setup():
+        field = pathfinding.DistanceField(main3.generate_maze(size, size, "backtracker", seed=1))
+        goals = iter([(1, 1), (size - 2, size - 2)] * 10 ** 6)
+
+        def step():
+            field.set_goal(*next(goals))
+            field.rebuild()
+        return step
+    return setup
+
+
+# Шаг логики, когда герой всё время уходит: поле перестраивается частями, не больше REBUILD_LAYERS слоёв за шаг
+def field_update_case(size):
+    def setup():
+        field = pathfinding.DistanceField(main3.generate_maze(size, size, "backtracker", seed=1))
+        goals = iter([(1, 1), (size - 2, size - 2)] * 10 ** 6)
+
+        def step():
+            field.set_goal(*next(goals))
+            field.update()
+        return step
+    return setup
+
+
+for size in (101, 301, 501):
+    case(f"Monster.bfs {size}x{size}")(bfs_case(size))
+    case(f"DistanceField.rebuild {size}x{size}")(field_case(size))
+    case(f"DistanceField.update {size}x{size}")(field_update_case(size))
+
+
+# Кадр лабиринта/снега на разных разрешениях; камера идёт по лабиринту, как за героем
+def draw_case(resolution, what):
+    def setup():
+        game = main3.Game(size=RESOLUTIONS[resolution])
+        cells = game.maze.open_cells()
+        frames = iter(range(10 ** 9))
+
+        def step():
+            if what == "maze":
+                x, y = cells[next(frames) // 10 % len(cells)]
+                game.draw_maze(x, y)
+            else:
+                game.update_snowstorm()
+                game.draw_snowstorm()
+        return step
+    return setup
+
+
+for resolution in RESOLUTIONS:
+    case(f"draw_maze {resolution}")(draw_case(resolution, "maze"))
+    case(f"draw_snowstorm {resolution}")(draw_case(resolution, "snow"))
+
+
+# Шаг второго уровня, когда в лабиринте бродит много врагов
+def collision_case(count):
+    def setup():
+        import main2
+
+        random.seed(1)
+        main2.init(headless=True)
+        level = main2.Level()
+        for _ in range(count - 1):
+            level.enemy_group.add(main2.Enemy(level.walls))
+        keys = replay.Keys()
+
+        def step():
+            level.enemy_group.update(level.walls)
+            pygame.sprite.spritecollide(level.player, level.enemy_group, False)
+            level.player.update(keys, level.walls)
+        return step
+    return setup
+
+
+for count in (1, 100, 1000):
+    case(f"main2 collisions {count} enemies")(collision_case(count))
+
+
+# Большая карта первого уровня: загрузка из кэша, компиляция текста, создание уровня, индекс триггеров и кадр камеры
+def level_case(size, what):
+    def setup():
+        import level1
+
+        rng = random.Random(1)
+        rows = ["".join(rng.choice("ptttbdlzsvh") for _ in range(size)) for _ in range(size)]
+        rows[1] = "@" + rows[1][1:]
+        rows[0] = rows[0][:-1] + "w"
+        path = os.path.join(TEMP_DIR.name, f"big{size}.map")
+        with open(path, "w") as file:
+            file.write("\n".join(rows))
+        # load_level ищет карты в data/
+        name = os.path.relpath(path, "data")
+        if what == "load":
+            return lambda: level1.load_level(name)
+        if what == "compile":
+            import levels
+
+            return lambda: levels.compile_rows(levels.text_rows(path), levels.LEVEL1_TILES)
+
+        level = level1.load_level(name)
+        tile = pygame.Surface((50, 50))
+        level1.images = {tile_name: tile for tile_name in ("bochkes", "dereves", "lujes", "pugales", "putes", "senes",
+                                                          "traves", "zabores", "home", "shipes")}
+        level1.tile_width = level1.tile_height = 50
+        if what == "triggers":
+            return lambda: level1.index_triggers(level)
+        if what == "scroll":
+            # камера едет по диагонали через всю карту; большой уровень рисуется окнами
+            screen = pygame.display.set_mode((400, 400))
+            view = level1.LevelView(level)
+            offsets = iter(range(10 ** 9))
+
+            def scroll():
+                offset = next(offsets) * 7 % (size * 50 - 400)
+                view.draw(screen, offset, offset)
+            return scroll
+
+        def step():
+            level1.all_sprites = pygame.sprite.Group()
+            level1.player_group = pygame.sprite.Group()
+            level1.generate_level(level)
+        return step
+    return setup
+
+
+for size in (100, 500):
+    case(f"load_level {size}x{size}")(level_case(size, "load"))
+    case(f"compile_level {size}x{size}")(level_case(size, "compile"))
+    case(f"level1 scroll {size}x{size}")(level_case(size, "scroll"))
+    case(f"index_triggers {size}x{size}")(level_case(size, "triggers"))
+    case(f"generate_level {size}x{size}")(level_case(size, "generate"))
+
+
+def run(names, repeat):
+    results = {}
+    for name in names:
+        results[name] = measure(CASES[name], repeat)
+        print(f"{name:<36} {results[name]['ms']:10.3f} мс")
+    return results
+
+
+def gated(baseline, name):
+    return name in baseline and baseline[name]["ms"] >= MIN_GATED_MS
+
+
+# Во сколько раз машина сейчас медленнее, чем при записи эталона: медиана отношений по проверяемым замерам
+def drift(results, baseline):
+    ratios = [result["ms"] / baseline[name]["ms"] for name, result in results.items() if gated(baseline, name)]
+    if len(ratios) < MIN_DRIFT_CASES:
+        return 1.0
+    return statistics.median(ratios)
+
+
+# x — во сколько раз замер медленнее эталона, пересчитанного на сдвиг скорости машины scale
+def compare(results, baseline, threshold, scale):
+    regressions = []
+    print(f"\nмашина сейчас: {scale:.2f} от скорости эталона")
+    print(f"{'замер':<36} {'эталон':>10} {'сейчас':>10} {'x':>6}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        expected = baseline[name]["ms"] * scale
+        ratio = result["ms"] / expected
+        checked = gated(baseline, name)
+        mark = (" !" if ratio > threshold else "") if checked else "  (короче MIN_GATED_MS, не проверяется)"
+        print(f"{name:<36} {expected:10.3f} {result['ms']:10.3f} {ratio:6.2f}{mark}")
+        if checked and ratio > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-k", dest="filter", default="", help="только замеры, в названии которых есть эта строка")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="куда записать результаты (JSON)")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="записать результаты как эталон")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    args = parser.parse_args()
+
+    names = [name for name in CASES if args.filter in name]
+    report = {
+        "machine": {"python": platform.python_version(), "pygame": pygame.version.ver,
+                    "platform": platform.platform(), "processor": platform.processor()},
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "results": run(names, args.repeat),
+    }
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as file:
+                baseline = json.load(file)["results"]
+        report["results"] = {**baseline, **report["results"]}
+        with open(args.baseline, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"\nэталон записан в {args.baseline}")
+        pygame.quit()
+        return
+    if not os.path.exists(args.baseline):
+        # без эталона проверка не пройдена: молча зелёный прогон скрыл бы регрессию
+        print(f"\nэталона нет ({args.baseline}), сравнивать не с чем: запустите с --update-baseline")
+        sys.exit(2)
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)["results"]
+    results = report["results"]
+    scale = drift(results, baseline)
+    regressions = compare(results, baseline, args.threshold, scale)
+    for _ in range(RETRIES):
+        if not regressions:
+            break
+        print(f"\nперемеряем: {', '.join(regressions)}")
+        # в зачёт идёт лучший замер из всех попыток
+        for name, result in run(regressions, args.repeat).items():
+            if result["ms"] < results[name]["ms"]:
+                results[name] = result
+        regressions = compare({name: results[name] for name in regressions}, baseline, args.threshold, scale)
+    pygame.quit()
+    if regressions:
+        print(f"\nмедленнее эталона больше чем в {args.threshold} раза: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import numpy as np
+
+# Типы клеток
+FLOOR = 0
+WALL = 1
+EXIT = 2
+
+# Биты маски соседей, порядок как в pathfinding.DIRECTIONS
+RIGHT = 1
+LEFT = 2
+DOWN = 4
+UP = 8
+
+
+# Компактная сетка лабиринта: одна клетка — один байт
+class Grid:
+    def __init__(self, width, height, fill=WALL):
+        self.cells = np.full((height, width), fill, dtype=np.uint8)
+
+    @classmethod
+    def from_array(cls, cells):
+        grid = cls.__new__(cls)
+        grid.cells = np.ascontiguousarray(cells, dtype=np.uint8)
+        return grid
+
+    # rows — список строк, legend — {символ: тип клетки}, остальные символы считаются полом
+    @classmethod
+    def from_rows(cls, rows, legend, default=FLOOR):
+        width = max(len(row) for row in rows)
+        codes = np.full(256, default, dtype=np.uint8)
+        for char, cell in legend.items():
+            codes[ord(char)] = cell
+        raw = np.frombuffer("".join(row.ljust(width) for row in rows).encode("latin-1"), dtype=np.uint8)
+        return cls.from_array(codes[raw].reshape(len(rows), width))
+
+    @property
+    def width(self):
+        return self.cells.shape[1]
+
+    @property
+    def height(self):
+        return self.cells.shape[0]
+
+    # grid[y][x] и grid[y, x] работают как у numpy-массива
+    def __getitem__(self, key):
+        return self.cells[key]
+
+    def __setitem__(self, key, value):
+        self.cells[key] = value
+
+    def __len__(self):
+        return self.height
+
+    def __iter__(self):
+        return iter(self.cells)
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def passable(self, walkable=(FLOOR, EXIT)):
+        return np.isin(self.cells, walkable)
+
+    def neighbour_mask(self, walkable=(FLOOR, EXIT)):
+        open_cells = self.passable(walkable).view(np.uint8)
+        mask = np.zeros(self.cells.shape, dtype=np.uint8)
+        mask[:, :-1] |= open_cells[:, 1:] * RIGHT
+        mask[:, 1:] |= open_cells[:, :-1] * LEFT
+        mask[:-1, :] |= open_cells[1:, :] * DOWN
+        mask[1:, :] |= open_cells[:-1, :] * UP
+        return mask
+
+    # Координаты (x, y) всех проходимых клеток
+    def open_cells(self, walkable=(FLOOR, EXIT)):
+        ys, xs = np.nonzero(self.passable(walkable))
+        return list(zip(xs.tolist(), ys.tolist()))
+
+    # Видимое окно без копирования; начало окна обрезается до (max(x, 0), max(y, 0))
+    def window(self, x, y, width, height):
+        return self.cells[max(y, 0):max(y + height, 0), max(x, 0):max(x + width, 0)]
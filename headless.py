@@ -0,0 +1,318 @@
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import time
+
+# Без окна и звука: так уровни запускаются на CI без экрана и GPU
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+import levels
+import replay
+from grid import FLOOR, WALL, EXIT
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DIRECTIONS = {"up": (0, -1), "down": (0, 1), "left": (-1, 0), "right": (1, 0)}
+
+# Сколько шагов логики даём на одну игру, потом она считается ничьей (timeout)
+MAX_TICKS = 10000
+
+
+def direction_to(start, cell):
+    return [name for name, step in DIRECTIONS.items()
+            if (start[0] + step[0], start[1] + step[1]) == cell]
+
+
+# Кратчайший путь по правилам ходьбы уровня (level.moves), вместе со стартовой клеткой; через blocked не ходим
+def find_path(level, start, goal, blocked=()):
+    came_from = {start: None}
+    queue = [start]
+    for cell in queue:
+        if cell == goal:
+            path = []
+            while cell is not None:
+                path.append(cell)
+                cell = came_from[cell]
+            return path[::-1]
+        for neighbour in level.moves(cell):
+            if neighbour not in came_from and neighbour not in blocked:
+                came_from[neighbour] = cell
+                queue.append(neighbour)
+    return []
+
+
+# Ввод: на каждом шаге логики возвращает набор направлений ("up", "down", "left", "right")
+
+# Направления по заранее записанному списку, потом герой стоит
+class ScriptedInput:
+    def __init__(self, moves):
+        self.moves = iter(moves)
+
+    def __call__(self, level):
+        move = next(self.moves, None)
+        return [move] if move else []
+
+
+class RandomInput:
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+
+    def __call__(self, level):
+        return [self.rng.choice(list(DIRECTIONS))]
+
+
+# ИИ: идёт к цели кратчайшим путём в обход опасных клеток (level.danger() — монстры и клетки рядом с ними).
+# Путь ищется заново, если герой с него сошёл или на пути появилась опасная клетка.
+# Обхода нет — идёт кратчайшим путём как есть
+class PathInput:
+    def __init__(self, seed=None):
+        self.path = []
+
+    def __call__(self, level):
+        position = level.position
+        danger = level.danger()
+        if position in self.path:
+            del self.path[:self.path.index(position)]
+        if position not in self.path or danger.intersection(self.path[1:]):
+            self.path = (find_path(level, position, level.goal, danger)
+                         or find_path(level, position, level.goal))
+        if len(self.path) < 2:
+            return []
+        return level.steer(self.path[1])
+
+
+POLICIES = {"path": PathInput, "random": RandomInput}
+
+
+# Уровни без отрисовки. У каждого: position и goal (клетки), moves(cell) — куда можно шагнуть,
+# steer(cell) — какие направления нажать, чтобы попасть в соседнюю клетку, danger() — клетки, которых
+# ИИ сторонится, KEYS — клавиши направлений,
+# update(keys) — один шаг логики, возвращает "win", "loss" или None.
+# random сеет тот, кто создаёт уровень; maze_seed нужен только третьему уровню
+
+class Level1:
+    KEYS = {"up": pygame.K_UP, "down": pygame.K_DOWN, "left": pygame.K_LEFT, "right": pygame.K_RIGHT}
+
+    def __init__(self, maze_seed=None):
+        import level1
+
+        self.level1 = level1
+        self.map = level1.load_level('map1.map')
+        self.hero = level1.Hero(self.map.positions('@')[0])
+        ys, xs = (self.map.attributes & levels.GOAL).nonzero()
+        self.goal = int(xs[0]), int(ys[0])
+        self.triggers = level1.index_triggers(self.map)
+        level1.fire_triggers(self.triggers, self.hero, None, self.hero.pos)
+
+    @property
+    def position(self):
+        return self.hero.pos
+
+    def moves(self, cell):
+        for movement in DIRECTIONS:
+            neighbour = self.level1.next_cell(self.map, cell, movement)
+            if neighbour:
+                yield neighbour
+
+    def steer(self, cell):
+        return direction_to(self.position, cell)
+
+    def danger(self):
+        return set()
+
+    def update(self, keys):
+        # те же правила шага, что и в game1
+        return self.level1.logic_step(self.map, self.triggers, self.hero, self.level1.pressed_move(keys))
+
+
+class Level2:
+    KEYS = {"up": pygame.K_UP, "down": pygame.K_DOWN, "left": pygame.K_LEFT, "right": pygame.K_RIGHT}
+
+    def __init__(self, maze_seed=None):
+        import main2
+
+        main2.init(headless=True)
+        self.main2 = main2
+        self.level = main2.Level()
+        self.grid = main2.MAZE.grid
+        self.tile = main2.TILE_SIZE
+
+    def cell_of(self, sprite):
+        return sprite.rect.centerx // self.tile, sprite.rect.centery // self.tile
+
+    @property
+    def position(self):
+        return self.cell_of(self.level.player)
+
+    @property
+    def goal(self):
+        return self.cell_of(self.level.treasure)
+
+    def moves(self, cell):
+        for dx, dy in DIRECTIONS.values():
+            x, y = cell[0] + dx, cell[1] + dy
+            if self.grid.in_bounds(x, y) and self.grid[y, x] != WALL:
+                yield x, y
+
+    def steer(self, cell):
+        # игрок ходит по пикселям: ведём его центр к центру клетки, с допуском в полшага
+        rect, slack = self.level.player.rect, self.level.player.speed // 2
+        dx = cell[0] * self.tile + self.tile // 2 - rect.centerx
+        dy = cell[1] * self.tile + self.tile // 2 - rect.centery
+        directions = []
+        if abs(dx) > slack:
+            directions.append("right" if dx > 0 else "left")
+        if abs(dy) > slack:
+            directions.append("down" if dy > 0 else "up")
+        return directions
+
+    def danger(self):
+        return set()
+
+    def update(self, keys):
+        return self.level.update(keys)
+
+
+class Level3:
+    KEYS = {"up": pygame.K_w, "down": pygame.K_s, "left": pygame.K_a, "right": pygame.K_d}
+
+    def __init__(self, maze_seed=None):
+        import main3
+
+        self.game = main3.Game(headless=True, maze_seed=maze_seed)
+        self.goal = (self.game.maze.width - 2, self.game.maze.height - 2)
+
+    @property
+    def position(self):
+        return self.game.hero.x, self.game.hero.y
+
+    def moves(self, cell):
+        for dx, dy in DIRECTIONS.values():
+            x, y = cell[0] + dx, cell[1] + dy
+            if self.game.maze.in_bounds(x, y) and self.game.maze[y, x] in (FLOOR, EXIT):
+                yield x, y
+
+    def steer(self, cell):
+        return direction_to(self.position, cell)
+
+    # Монстры и соседние с ними клетки
+    def danger(self):
+        return {(monster.x + dx, monster.y + dy) for monster in self.game.monsters
+                for dx, dy in [(0, 0)] + list(DIRECTIONS.values())}
+
+    def update(self, keys):
+        return self.game.update(keys)
+
+
+LEVELS = {1: Level1, 2: Level2, 3: Level3}
+# Частота шагов логики уровней, как FPS в level1, main2 и main3
+TICK_RATES = {1: 20, 2: 30, 3: 30}
+
+
+# Одна игра: (уровень, seed, ввод, лимит шагов, папка для записей) -> (уровень, seed, итог, число шагов).
+# seed задаёт и random, и лабиринт третьего уровня
+def play(job):
+    level_number, seed, policy, max_ticks, record_dir = job
+    random.seed(seed)
+    level = LEVELS[level_number](seed)
+    controller = POLICIES[policy](seed)
+    recording = replay.Replay(level_number, seed, TICK_RATES[level_number], seed) if record_dir else None
+    result, ticks = "timeout", max_ticks
+    for tick in range(1, max_ticks + 1):
+        keys = replay.Keys(level.KEYS[name] for name in controller(level))
+        if recording is not None:
+            recording.record(keys)
+        status = level.update(keys)
+        if status:
+            result, ticks = status, tick
+            break
+    if recording is not None:
+        recording.save(os.path.join(record_dir, f"level{level_number}-{seed}.rpl"))
+    return level_number, seed, result, ticks
+
+
+def init_worker():
+    # уровни читают файлы из data/ и sprites/ относительными путями
+    os.chdir(ROOT)
+
+
+# Раскидывает seed'ы по всем ядрам и собирает результаты
+def run_batch(levels, games, policy="path", workers=None, max_ticks=MAX_TICKS, first_seed=0, record_dir=None):
+    jobs = [(level, seed, policy, max_ticks, record_dir) for level in levels for seed in range(first_seed, first_seed + games)]
+    workers = workers or os.cpu_count()
+    if workers == 1:
+        # игры идут в этом же процессе: рабочую папку меняем только на время прогона
+        cwd = os.getcwd()
+        init_worker()
+        try:
+            return [play(job) for job in jobs]
+        finally:
+            os.chdir(cwd)
+    # Пул закрывается через close/join, а не через terminate (его делает выход из with):
+    # воркеры дорабатывают и выходят сами, и завершение не зависит от обработки SIGTERM в них
+    pool = multiprocessing.Pool(workers, initializer=init_worker)
+    try:
+        results = list(pool.imap_unordered(play, jobs, chunksize=max(1, len(jobs) // (workers * 8))))
+    except BaseException:
+        pool.terminate()
+        raise
+    pool.close()
+    pool.join()
+    return results
+
+
+def summarize(results):
+    stats = {}
+    for level in sorted({result[0] for result in results}):
+        rows = [result for result in results if result[0] == level]
+        ticks = [result[3] for result in rows]
+        stats[level] = {
+            "games": len(rows),
+            "win": sum(result[2] == "win" for result in rows),
+            "loss": sum(result[2] == "loss" for result in rows),
+            "timeout": sum(result[2] == "timeout" for result in rows),
+            "ticks_mean": statistics.mean(ticks),
+            "ticks_median": statistics.median(ticks),
+            "ticks_max": max(ticks),
+        }
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Прогон уровней без окна")
+    parser.add_argument("--level", type=int, choices=sorted(LEVELS), action="append",
+                        help="номер уровня, можно несколько раз (по умолчанию все)")
+    parser.add_argument("--games", type=int, default=100, help="игр на уровень")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="path")
+    parser.add_argument("--workers", type=int, default=None, help="процессов (по умолчанию все ядра)")
+    parser.add_argument("--max-ticks", type=int, default=MAX_TICKS)
+    parser.add_argument("--seed", type=int, default=0, help="первый seed")
+    parser.add_argument("--json", help="сохранить статистику в файл")
+    parser.add_argument("--record", metavar="DIR", help="записать каждую игру (смотреть через replay.py)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = run_batch(args.level or sorted(LEVELS), args.games, args.policy, args.workers,
+                        args.max_ticks, args.seed, args.record and os.path.abspath(args.record))
+    elapsed = time.perf_counter() - start
+    stats = summarize(results)
+
+    for level, row in stats.items():
+        print(f"уровень {level}: игр {row['games']}, побед {row['win']}, поражений {row['loss']}, "
+              f"не доиграно {row['timeout']}, шагов в среднем {row['ticks_mean']:.0f} "
+              f"(медиана {row['ticks_median']:.0f}, максимум {row['ticks_max']})")
+    print(f"{len(results)} игр за {elapsed:.2f} с ({len(results) / elapsed:.0f} игр/с)")
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"policy": args.policy, "elapsed": elapsed, "levels": stats}, file, indent=2)
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, ROOT)
+    main()
@@ -0,0 +1,516 @@
+import pygame
+import os
+import sys
+
+import assets
+import levels
+import replay
+import storage
+from timestep import FixedTimestep, RENDER_FPS, lerp
+
+# Первый уровень: герой ходит по клеткам карты data/map1.map, шипы отнимают здоровье, дом — выход.
+# Окно входа (main1) импортирует модуль только по кнопке «Начать игру»
+
+
+def load_image(name, color_key=None):
+    fullname = os.path.join('data', name)
+    try:
+        if color_key is None:
+            # без цветового ключа картинка общая и берётся из кэша
+            return assets.image(fullname, convert="opaque")
+        image = pygame.image.load(fullname).convert()
+    except pygame.error as mes:
+        print(f'Не могу загрузить файл: {name}')
+        print(mes)
+        return
+    if color_key == -1:
+        color_key = image.get_at((0, 0))
+    image.set_colorkey(color_key)
+    return image
+
+
+# Какую долю оставшегося пути до героя камера проходит за шаг логики
+CAMERA_SMOOTHING = 0.35
+# Уровень раскладывается на одну поверхность целиком, если она не больше LEVEL_CACHE_LIMIT пикселей по стороне;
+# больший — окном вокруг камеры с запасом LEVEL_CACHE_MARGIN клеток, окно перестраивается, когда камера из него выходит
+LEVEL_CACHE_LIMIT = 4096
+LEVEL_CACHE_MARGIN = 8
+# Цвет пустых клеток на поверхности уровня, сквозь них виден фон
+EMPTY_COLOR = (255, 0, 255)
+
+
+class Camera:
+    # x, y — левый верхний угол экрана в пикселях уровня; камера сразу ставится на target
+    def __init__(self, target):
+        self.x, self.y = self.target(target)
+        self.prev_x, self.prev_y = self.x, self.y
+
+    # герой в центре экрана, но за край уровня камера не выходит (маленький уровень — по центру)
+    def target(self, target):
+        width, height = screen.get_size()
+        position = []
+        for center, size, level_size in ((target.rect.centerx, width, max_x * tile_width),
+                                         (target.rect.centery, height, max_y * tile_height)):
+            if level_size <= size:
+                position.append((level_size - size) / 2)
+            else:
+                position.append(min(max(center - size / 2, 0), level_size - size))
+        return position
+
+    # раз в шаг логики: плавно догоняем героя
+    def update(self, target):
+        self.prev_x, self.prev_y = self.x, self.y
+        x, y = self.target(target)
+        self.x += (x - self.x) * CAMERA_SMOOTHING
+        self.y += (y - self.y) * CAMERA_SMOOTHING
+        if abs(x - self.x) < 0.5 and abs(y - self.y) < 0.5:
+            self.x, self.y = x, y
+
+    # смещение для кадра между шагами логики
+    def offset(self, alpha):
+        return round(lerp(self.prev_x, self.x, alpha)), round(lerp(self.prev_y, self.y, alpha))
+
+
+# Плитки уровня, заранее разложенные на поверхность; кадр — один blit её окна
+class LevelView:
+    def __init__(self, level):
+        self.level = level
+        self.surface = None
+        self.rect = None  # какие клетки лежат на surface
+
+    def build(self, rect):
+        # numpy нужен только при раскладке плиток, а не при импорте модуля
+        import numpy as np
+
+        self.rect = rect
+        self.surface = pygame.Surface((rect.width * tile_width, rect.height * tile_height)).convert()
+        self.surface.fill(EMPTY_COLOR)
+        self.surface.set_colorkey(EMPTY_COLOR)
+        window = self.level.tiles[rect.top:rect.bottom, rect.left:rect.right]
+        blits = []
+        for index, name in enumerate(self.level.names):
+            if name is None:
+                continue
+            ys, xs = np.nonzero(window == index)
+            blits += [(images[name], (x * tile_width, y * tile_height)) for x, y in zip(xs.tolist(), ys.tolist())]
+        self.surface.blits(blits, doreturn=False)
+
+    # часть уровня с левым верхним углом (x, y) в пикселях уровня — на всю поверхность target
+    def draw(self, target, x, y):
+        width, height = target.get_size()
+        bounds = pygame.Rect(0, 0, self.level.width, self.level.height)
+        visible = pygame.Rect(x // tile_width, y // tile_height,
+                              width // tile_width + 2, height // tile_height + 2).clip(bounds)
+        if self.surface is None or not self.rect.contains(visible):
+            if max(self.level.width * tile_width, self.level.height * tile_height) <= LEVEL_CACHE_LIMIT:
+                self.build(bounds)
+            else:
+                self.build(visible.inflate(LEVEL_CACHE_MARGIN * 2, LEVEL_CACHE_MARGIN * 2).clip(bounds))
+        target.blit(self.surface, (self.rect.x * tile_width - x, self.rect.y * tile_height - y))
+
+
+# Триггеры клеток: свойство клетки -> (что делать, когда герой входит на клетку, что — когда уходит).
+# Срабатывают только при смене клетки; между ходами герой ничего не проверяет
+def enter_goal(hero):
+    hero.won = True
+
+
+def enter_hazard(hero):
+    hero.on_hazard = True
+
+
+def leave_hazard(hero):
+    hero.on_hazard = False
+
+
+TRIGGERS = {levels.GOAL: (enter_goal, None), levels.HAZARD: (enter_hazard, leave_hazard)}
+
+
+# Индекс клеток с триггерами, строится один раз на уровень: (x, y) -> [(вход, выход), ...]
+def index_triggers(level):
+    import numpy as np
+
+    index = {}
+    for flag, handlers in TRIGGERS.items():
+        ys, xs = np.nonzero(level.attributes & flag)
+        for cell in zip(xs.tolist(), ys.tolist()):
+            index.setdefault(cell, []).append(handlers)
+    return index
+
+
+# who перешёл из old_cell в new_cell (old_cell=None — только что появился на уровне)
+def fire_triggers(index, who, old_cell, new_cell):
+    for _, leave in index.get(old_cell, ()):
+        if leave is not None:
+            leave(who)
+    for enter, _ in index.get(new_cell, ()):
+        if enter is not None:
+            enter(who)
+
+
+# Состояние героя, с которым работают правила шага: клетка, победа, шипы под ногами, здоровье.
+# Player добавляет к нему спрайт, headless.py играет без окна одним Hero
+class Hero:
+    def __init__(self, pos):
+        self.pos = pos
+        # состояние, которое меняют триггеры клеток
+        self.won = False
+        self.on_hazard = False
+        self.hurts = 30
+
+    def move(self, pos_x, pos_y):
+        self.pos = pos_x, pos_y
+
+
+class Player(Hero, pygame.sprite.Sprite):
+    walkRight = walkLeft = walkUp = walkDown = playerStand = None
+
+    # кадры грузятся при создании первого игрока, а не при импорте модуля
+    @classmethod
+    def load_sprites(cls):
+        if cls.playerStand is None:
+            frames = assets.walk_frames()
+            cls.walkRight, cls.walkLeft = frames["right"], frames["left"]
+            cls.walkUp, cls.walkDown = frames["up"], frames["down"]
+            cls.playerStand = frames["stand"]
+
+    def __init__(self, pos_x, pos_y):
+        pygame.sprite.Sprite.__init__(self, player_group, all_sprites)
+        Hero.__init__(self, (pos_x, pos_y))
+        Player.load_sprites()
+        self.image = Player.playerStand
+        self.rect = self.image.get_rect().move(
+            tile_width * pos_x + 15, tile_height * pos_y + 5)
+        self.animCount = 0
+        self.right = False
+        self.left = False
+        self.up = False
+        self.down = False
+        self.heart = assets.image('data/heart.png', (30, 30))
+
+    def move(self, pos_x, pos_y):
+        Hero.move(self, pos_x, pos_y)
+        self.rect.topleft = (tile_width * pos_x + 15, tile_height * pos_y + 5)
+
+    def draw_hearts(self):
+        for i in range(self.hurts // 10):
+            screen.blit(self.heart, (i * self.heart.width + 5, 0))
+
+    def update(self):
+        self.animCount += 1
+        if self.animCount >= 30:
+            self.animCount = 0
+
+        if self.animCount <= 25:
+            if self.left:
+                self.image = Player.walkLeft[self.animCount % 4]
+            elif self.right:
+                self.image = Player.walkRight[self.animCount % 4]
+            elif self.up:
+                self.image = Player.walkUp[self.animCount % 4]
+            elif self.down:
+                self.image = Player.walkDown[self.animCount % 4]
+        else:
+            self.image = self.playerStand
+            self.right = False
+            self.left = False
+            self.up = False
+            self.down = False
+
+
+# Перерисовка только изменившихся участков экрана
+class DirtyRenderer:
+    def __init__(self, screen, fon, view):
+        self.screen = screen
+        self.fon = fon
+        self.view = view
+        # фон вместе с плитками, из него восстанавливаются грязные участки
+        self.scene = pygame.Surface(screen.get_size()).convert()
+        self.full = True
+        self.offset = None
+        self.hero_rect = None
+        self.hero_image = None
+        self.hearts = 0
+
+    # нужно перерисовать весь экран (например, после перемотки записи)
+    def invalidate(self):
+        self.full = True
+
+    def hearts_rect(self, hero, count):
+        return pygame.Rect(0, 0, count * hero.heart.width + 5, hero.heart.height)
+
+    # offset — смещение камеры (левый верхний угол экрана в пикселях уровня)
+    def draw(self, hero, offset):
+        hero_rect = hero.rect.move(-offset[0], -offset[1])
+        if self.full or offset != self.offset:
+            self.scene.blit(self.fon, (0, 0))
+            self.view.draw(self.scene, *offset)
+            self.screen.blit(self.scene, (0, 0))
+            self.screen.blit(hero.image, hero_rect)
+            hero.draw_hearts()
+            pygame.display.flip()
+            self.full = False
+            self.offset = offset
+        else:
+            rects = []
+            if hero.image is not self.hero_image or hero_rect != self.hero_rect:
+                rects.append(self.hero_rect.union(hero_rect))
+            if hero.hurts // 10 != self.hearts:
+                rects.append(self.hearts_rect(hero, max(self.hearts, hero.hurts // 10)))
+            if rects:
+                for rect in rects:
+                    self.screen.blit(self.scene, rect, rect)
+                self.screen.blit(hero.image, hero_rect)
+                hero.draw_hearts()
+                pygame.display.update(rects)
+        self.hero_rect = hero_rect
+        self.hero_image = hero.image
+        self.hearts = hero.hurts // 10
+
+
+# Карта из data/ в скомпилированном виде (см. levels.py); level[y][x] — символ клетки
+def load_level(filename):
+    return levels.load(os.path.join('data', filename), levels.LEVEL1_TILES)
+
+
+def generate_level(level):
+    # плитки рисует LevelView одной поверхностью, спрайт нужен только герою
+    x, y = level.positions('@')[0]
+    new_player = Player(x, y)
+    # вернем игрока и то, чем рисовать уровень
+    return new_player, LevelView(level)
+
+
+clock = pygame.time.Clock()
+
+
+def terminate():
+    pygame.quit()
+    sys.exit()
+
+
+def start_screen1():
+    # второй уровень и gif-анимация нужны только здесь
+    import gif_pygame
+    from main2 import game
+
+    intro_text = ["ПОЗДРАВЛЯЕМ!", "",
+                  "Вы прошли первый уровень",
+                  "Чтобы перейти к следующему",
+                  "нажмите на любую кнопку"]
+    screen.fill('white')
+    gif = gif_pygame.load("data/animation.gif", 100)
+    font = pygame.font.Font(None, 30)
+    text_coord = 10
+    for line in intro_text:
+        string_rendered = font.render(line, 1, pygame.Color('black'))
+        intro_rect = string_rendered.get_rect()
+        text_coord += 10
+        intro_rect.top = text_coord
+        intro_rect.x = 10
+        text_coord += intro_rect.height
+        screen.blit(string_rendered, intro_rect)
+    while True:
+        gif.render(screen, (128 - gif.get_width() * 0.3, 256 - gif.get_height() * 0.5))
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                terminate()
+            elif event.type == pygame.KEYDOWN or event.type == pygame.MOUSEBUTTONDOWN:
+                # subprocess.run(['python', 'main2.py'])
+                game()
+                quit()
+        pygame.display.flip()
+        clock.tick(FPS)
+
+
+def finish_screen():
+    intro_text = ["К сожалению, вы проиграли", "",
+                  "Чтобы начать заново, нажмите enter"]
+    screen.fill('white')
+    font = pygame.font.Font(None, 30)
+    text_coord = 10
+    for line in intro_text:
+        string_rendered = font.render(line, 1, pygame.Color('black'))
+        intro_rect = string_rendered.get_rect()
+        text_coord += 10
+        intro_rect.top = text_coord
+        intro_rect.x = 10
+        text_coord += intro_rect.height
+        screen.blit(string_rendered, intro_rect)
+    pygame.display.flip()
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                terminate()
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_RETURN:
+                    game1()
+
+
+MOVES = {'up': (0, -1), 'down': (0, 1), 'right': (1, 0), 'left': (-1, 0)}
+
+
+# Клетка, в которую герой попадёт ходом movement из pos, или None, если туда нельзя.
+# Правило одно для всех направлений: клетка внутри карты и помечена levels.WALKABLE
+def next_cell(level, pos, movement):
+    dx, dy = MOVES[movement]
+    x, y = pos[0] + dx, pos[1] + dy
+    if 0 <= x < level.width and 0 <= y < level.height and level.attributes[y, x] & levels.WALKABLE:
+        return x, y
+    return None
+
+
+# Какой ход выбран нажатыми клавишами; стрелки проверяются в том же порядке, что и раньше
+def pressed_move(keys):
+    for key, movement in ((pygame.K_UP, 'up'), (pygame.K_DOWN, 'down'),
+                          (pygame.K_RIGHT, 'right'), (pygame.K_LEFT, 'left')):
+        if keys[key]:
+            return movement
+    return None
+
+
+# Правила одного шага логики, общие для game1 и headless.py: ход movement (или None — стоим),
+# триггеры клеток, затем победа и урон, пока герой стоит на шипах. Возвращает "win", "loss" или None
+def logic_step(level, triggers, hero, movement):
+    cell = movement and next_cell(level, hero.pos, movement)
+    if cell:
+        old_pos = hero.pos
+        hero.move(*cell)
+        fire_triggers(triggers, hero, old_pos, cell)
+    if hero.won:
+        return "win"
+    if hero.on_hazard:
+        hero.hurts -= 1
+    if hero.hurts // 10 == 0:
+        return "loss"
+    return None
+
+
+DIRTY_RENDER = True
+
+
+# playback — запись партии, которую нужно показать вместо игры с клавиатуры
+def game1(playback=None):
+    global fon, tile_width, tile_height, screen, images, FPS
+    pygame.init()
+    size = w, h = (400, 400)
+    screen = pygame.display.set_mode(size)
+    FPS = 20
+
+    images = {'bochkes': load_image('bochkes.png'),
+              'dereves': load_image('dereves.png'),
+              'lujes': load_image('lujes.png'),
+              'pugales': load_image('pugales.png'),
+              'putes': load_image('putes.png'),
+              'senes': load_image('senes.png'),
+              'traves': load_image('traves.png'),
+              'zabores': load_image('zabores.png'),
+              'home': load_image('home.png'),
+              'shipes': load_image('shipes.png')}
+
+    def draw(alpha):
+        offset = camera.offset(alpha)
+        if DIRTY_RENDER:
+            renderer.draw(hero, offset)
+            return
+
+        screen.blit(fon, (0, 0))
+
+        view.draw(screen, *offset)
+        screen.blit(hero.image, hero.rect.move(-offset[0], -offset[1]))
+        hero.draw_hearts()
+
+        pygame.display.flip()
+
+    tile_width = tile_height = 50
+    fon = assets.image(os.path.join('data', 'fon1.png'), (w, h), convert="opaque")
+
+    # Партия строится заново и при перемотке записи назад
+    def start():
+        global hero, camera, all_sprites, player_group, level_map, triggers, max_x, max_y
+        nonlocal renderer, view, recording, tick
+        recording = None if playback is not None else replay.begin(1, FPS)
+        tick = 0
+
+        # карта читается при старте уровня, а не при импорте модуля
+        level_map = load_level('map1.map')
+        max_x = len(level_map[0])
+        max_y = len(level_map)
+
+        # группы спрайтов
+        all_sprites = pygame.sprite.Group()
+        player_group = pygame.sprite.Group()
+        hero, view = generate_level(level_map)
+        triggers = index_triggers(level_map)
+        fire_triggers(triggers, hero, None, hero.pos)
+        camera = Camera(hero)
+        screen.blit(fon, (0, 0))
+        renderer = DirtyRenderer(screen, fon, view)
+
+    # Один шаг логики: ход по нажатой стрелке, анимация, победа и шипы
+    def step(keys):
+        nonlocal tick
+        if recording is not None:
+            recording.record(keys)
+        tick += 1
+        movement = pressed_move(keys)
+        status = logic_step(level_map, triggers, hero, movement)
+        if movement:
+            hero.up, hero.down = movement == 'up', movement == 'down'
+            hero.right, hero.left = movement == 'right', movement == 'left'
+        hero.update()
+        camera.update(hero)
+        return status
+
+    renderer = view = recording = tick = None
+    start()
+    running = True
+    pending = []  # нажатые стрелки; за шаг логики делается один ход
+    # ходы, анимация, победа и урон считаются с частотой FPS, а кадры рисуются с частотой RENDER_FPS
+    timestep = FixedTimestep(FPS)
+    while running:
+        clock.tick(RENDER_FPS)
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif playback is not None:
+                target = replay.seek_key(event, tick, playback)
+                if target is not None:
+                    # назад — с начала, вперёд — шагами без отрисовки
+                    if target < tick:
+                        start()
+                    while tick < target and step(playback.keys(tick)) is None:
+                        pass
+                    renderer.invalidate()
+            elif event.type == pygame.KEYDOWN:
+                if pressed_move(replay.Keys([event.key])):
+                    pending.append(event.key)
+                else:
+                    hero.up = hero.down = hero.right = hero.left = False
+                    hero.animCount = 0
+        for _ in timestep.steps():
+            if playback is not None:
+                # запись доиграна — стоим на последнем кадре
+                if tick < len(playback) and step(playback.keys(tick)) is None:
+                    continue
+                break
+            status = step(replay.Keys(pending[:1]))
+            del pending[:1]
+            if status:
+                replay.save(recording)
+                storage.record_run(1, status, tick, FPS)
+            if status == "win":
+                start_screen1()
+                running = False
+                break
+            if status == "loss":
+                finish_screen()
+        if not running:
+            break
+        draw(timestep.alpha)
+    if playback is None:
+        replay.save(recording)
+
+
+if __name__ == "__main__":
+    game1()
@@ -0,0 +1,201 @@
+import hashlib
+import os
+import struct
+import xml.etree.ElementTree as ElementTree
+
+import numpy as np
+
+from grid import Grid, FLOOR, WALL, EXIT
+
+# Загрузка уровней из файлов: текстовые карты (символ — клетка) и карты Tiled (.tmx).
+# Карта компилируется в плоские массивы байтов (символы, номера плиток, типы клеток, свойства клеток)
+# и складывается в кэш на диске; при следующем запуске файл кэша отображается в память (mmap)
+# без разбора текста.
+CACHE_DIR = os.path.join("cache", "levels")
+DISK_CACHE = True
+CACHE_MAGIC = b"LBL2"
+# Заголовок кэша: магия, ширина, высота, длина блока с именами плиток
+HEADER = struct.Struct("<4sIIH")
+
+# Биты свойств клетки: на клетку можно встать, клетка ранит героя, клетка — цель уровня.
+# WALKABLE и GOAL следуют из типа клетки (не WALL и EXIT), остальные задаются в таблице
+WALKABLE = 1
+HAZARD = 2
+GOAL = 4
+
+# Таблицы клеток: символ карты -> (имя картинки плитки, тип клетки, дополнительные свойства).
+# Символов нет в таблице (например, '.', которым добиваются короткие строки) — пустая клетка без плитки
+EMPTY = (None, WALL, 0)
+PAD = '.'
+
+LEVEL1_TILES = {
+    'p': ('putes', FLOOR, 0),
+    '@': ('putes', FLOOR, 0),
+    'h': ('shipes', FLOOR, HAZARD),
+    'w': ('home', EXIT, 0),
+    'b': ('bochkes', WALL, 0),
+    'd': ('dereves', WALL, 0),
+    'l': ('lujes', WALL, 0),
+    'v': ('pugales', WALL, 0),
+    's': ('senes', WALL, 0),
+    't': ('traves', WALL, 0),
+    'z': ('zabores', WALL, 0),
+}
+
+LEVEL2_TILES = {
+    'W': ('wall', WALL, 0),
+    ' ': ('road', FLOOR, 0),
+}
+
+
+def attributes_of(cell, flags):
+    return flags | (WALKABLE if cell != WALL else 0) | (GOAL if cell == EXIT else 0)
+
+
+# Скомпилированный уровень: массивы height x width (uint8), общие для всех уровней.
+# chars — исходные символы, tiles — номер плитки в names (0 — без плитки),
+# cells — FLOOR/WALL/EXIT, attributes — биты WALKABLE/HAZARD/GOAL:
+# level.attributes[y, x] & WALKABLE — можно ли встать на клетку
+class LevelData:
+    def __init__(self, chars, tiles, cells, attributes, names):
+        self.chars = chars
+        self.tiles = tiles
+        self.cells = cells
+        self.attributes = attributes
+        self.names = names
+        self._rows = None
+
+    @property
+    def width(self):
+        return self.chars.shape[1]
+
+    @property
+    def height(self):
+        return self.chars.shape[0]
+
+    @property
+    def grid(self):
+        return Grid.from_array(self.cells)
+
+    # Строки карты — для кода, который смотрит на символы: level[y][x]
+    @property
+    def rows(self):
+        if self._rows is None:
+            self._rows = [row.tobytes().decode("latin-1") for row in self.chars]
+        return self._rows
+
+    def __len__(self):
+        return self.height
+
+    def __getitem__(self, y):
+        return self.rows[y]
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    # Координаты (x, y) всех клеток с символом char
+    def positions(self, char):
+        ys, xs = np.nonzero(self.chars == ord(char))
+        return list(zip(xs.tolist(), ys.tolist()))
+
+
+def compile_rows(rows, tiles):
+    width = max(len(row) for row in rows)
+    names = [None]
+    for name, _, _ in tiles.values():
+        if name not in names:
+            names.append(name)
+    tile_codes = np.zeros(256, dtype=np.uint8)
+    cell_codes = np.full(256, EMPTY[1], dtype=np.uint8)
+    attribute_codes = np.full(256, attributes_of(EMPTY[1], EMPTY[2]), dtype=np.uint8)
+    for char, (name, cell, flags) in tiles.items():
+        tile_codes[ord(char)] = names.index(name)
+        cell_codes[ord(char)] = cell
+        attribute_codes[ord(char)] = attributes_of(cell, flags)
+    chars = np.frombuffer("".join(row.ljust(width, PAD) for row in rows).encode("latin-1"),
+                          dtype=np.uint8).reshape(len(rows), width)
+    return LevelData(chars, tile_codes[chars], cell_codes[chars], attribute_codes[chars], names)
+
+
+def text_rows(path):
+    with open(path, 'r') as file:
+        rows = file.read().splitlines()
+    while rows and not rows[-1]:
+        rows.pop()
+    return rows
+
+
+# Карта из Tiled: символ клетки — свойство "char" плитки, клетки без плитки — PAD.
+# Слои накладываются по порядку, верхний перекрывает нижний
+def tmx_rows(path):
+    import pytmx
+
+    tmx = pytmx.TiledMap(path)
+    rows = [[PAD] * tmx.width for _ in range(tmx.height)]
+    for layer in tmx.visible_tile_layers:
+        for x, y, gid in tmx.layers[layer]:
+            char = (tmx.get_tile_properties_by_gid(gid) or {}).get("char") if gid else None
+            if char:
+                rows[y][x] = char
+    return ["".join(row) for row in rows]
+
+
+# Содержимое внешних наборов плиток карты (<tileset source="...tsx">): свойства "char" лежат в них,
+# поэтому правка .tsx тоже должна сбрасывать кэш
+def tileset_sources(path, source):
+    data = b""
+    for tileset in ElementTree.fromstring(source).findall("tileset"):
+        name = tileset.get("source")
+        if name:
+            with open(os.path.join(os.path.dirname(path), name), "rb") as file:
+                data += name.encode() + b"\0" + file.read()
+    return data
+
+
+def _cache_path(source, tiles):
+    key = hashlib.sha1(CACHE_MAGIC + source + repr(sorted(tiles.items())).encode()).hexdigest()
+    return os.path.join(CACHE_DIR, key + ".lvl")
+
+
+def _write_cache(cache_path, level):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    names = "\n".join(name or "" for name in level.names).encode()
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as file:
+        file.write(HEADER.pack(CACHE_MAGIC, level.width, level.height, len(names)))
+        file.write(names)
+        for array in (level.chars, level.tiles, level.cells, level.attributes):
+            file.write(np.ascontiguousarray(array).tobytes())
+    # сначала пишем во временный файл: параллельный запуск не увидит недописанный кэш
+    os.replace(temp_path, cache_path)
+
+
+def _read_cache(cache_path):
+    data = np.memmap(cache_path, dtype=np.uint8, mode="r")
+    magic, width, height, names_size = HEADER.unpack(data[:HEADER.size].tobytes())
+    if magic != CACHE_MAGIC:
+        return None
+    offset = HEADER.size + names_size
+    names = [name or None for name in data[HEADER.size:offset].tobytes().decode().split("\n")]
+    size = width * height
+    arrays = [data[offset + i * size:offset + (i + 1) * size].reshape(height, width) for i in range(4)]
+    return LevelData(*arrays, names)
+
+
+# path — .tmx или текстовая карта, tiles — таблица символов уровня
+def load(path, tiles):
+    with open(path, "rb") as file:
+        source = file.read()
+    if path.endswith(".tmx"):
+        source += tileset_sources(path, source)
+    cache_path = _cache_path(source, tiles)
+    if DISK_CACHE and os.path.exists(cache_path):
+        level = _read_cache(cache_path)
+        if level is not None:
+            return level
+
+    rows = tmx_rows(path) if path.endswith(".tmx") else text_rows(path)
+    level = compile_rows(rows, tiles)
+    if DISK_CACHE:
+        _write_cache(cache_path, level)
+    return level
@@ -0,0 +1,78 @@
+import math
+
+import numpy as np
+import pygame
+
+# Ширина мягкого края света в долях радиуса
+SOFT_EDGE = 0.35
+
+
+# Готовая маска затемнения вокруг источника света.
+# layers — список (радиус, непрозрачность): за радиусом слой затемняет экран, внутри — прозрачен.
+# Квадрат вокруг света считается один раз, а остальной экран закрашивается
+# четырьмя полосами без попиксельной альфы — без выделения памяти в каждом кадре.
+class LightMask:
+    def __init__(self, layers, soft=False):
+        self.layers = layers
+        self.soft = soft
+        self.radius = math.ceil(max(radius for radius, _ in layers))
+        self.patch = self.build_patch()
+        # непрозрачность за пределами всех радиусов: слои чёрного складываются как 1 - П(1 - a)
+        transmit = 1.0
+        for _, alpha in layers:
+            transmit *= 1 - alpha / 255
+        self.outer_alpha = round(255 * (1 - transmit))
+        self.dark = None
+
+    def build_patch(self):
+        side = self.radius * 2
+        coords = np.arange(side) - self.radius + 0.5
+        distance = np.sqrt(coords[:, None] ** 2 + coords[None, :] ** 2)
+        transmit = np.ones((side, side))
+        for radius, alpha in self.layers:
+            if self.soft:
+                # плавный переход от полностью светлого к тёмному у края радиуса
+                edge = np.clip((distance - radius * (1 - SOFT_EDGE)) / (radius * SOFT_EDGE), 0, 1)
+                strength = edge * edge * (3 - 2 * edge)
+            else:
+                strength = (distance >= radius).astype(float)
+            transmit *= 1 - strength * alpha / 255
+        patch = pygame.Surface((side, side), pygame.SRCALPHA)
+        patch.fill((0, 0, 0, 255))
+        pygame.surfarray.pixels_alpha(patch)[:] = np.round(255 * (1 - transmit)).astype(np.uint8)
+        return patch
+
+    def draw(self, screen, center):
+        rect = self.patch.get_rect(center=center)
+        screen.blit(self.patch, rect)
+
+        width, height = screen.get_size()
+        borders = [pygame.Rect(0, 0, width, rect.top),
+                   pygame.Rect(0, rect.bottom, width, height - rect.bottom),
+                   pygame.Rect(0, rect.top, rect.left, rect.height),
+                   pygame.Rect(rect.right, rect.top, width - rect.right, rect.height)]
+        if self.outer_alpha >= 255:
+            for border in borders:
+                if border.width > 0 and border.height > 0:
+                    screen.fill((0, 0, 0), border)
+            return
+
+        # тёмный слой с общей (не попиксельной) прозрачностью, создаётся один раз на размер экрана
+        if self.dark is None or self.dark.get_size() != (width, height):
+            self.dark = pygame.Surface((width, height)).convert()
+            self.dark.fill((0, 0, 0))
+            self.dark.set_alpha(self.outer_alpha)
+        for border in borders:
+            if border.width > 0 and border.height > 0:
+                screen.blit(self.dark, border, border)
+
+
+_masks = {}
+
+
+# Маски кэшируются по набору слоёв, поэтому одинаковый свет на разных уровнях строится один раз
+def get_mask(layers, soft=False):
+    key = (tuple(layers), soft)
+    if key not in _masks:
+        _masks[key] = LightMask(list(layers), soft)
+    return _masks[key]
@@ -5,22 +5,47 @@ import random
 import sys
 import math
 
-from main3 import Game
+import assets
+import levels
+import lighting
+import profiler
+import replay
+import storage
+from grid import WALL
+from timestep import FixedTimestep, RENDER_FPS, lerp
 
+# Мягкий радиальный край света вокруг игрока вместо резкого круга
+SOFT_LIGHT = False
 
-def init():
+
+# Вместо картинки — пустая поверхность того же размера (запуск без окна)
+def blank_image(path, size):
+    return pygame.Surface(size)
+
+
+# headless — без окна: картинки заменяются пустыми поверхностями нужного размера (для headless.py)
+def init(headless=False):
     global WIDTH, HEIGHT, SCREEN, clock, FPS, FONT
     global WHITE, BLACK, RED, BLUE, GREEN, YELLOW, GRAY
     global TILE_SIZE, WALL_TEXTURE, ROAD_TEXTURE, ENEMY_TEXTURE, PLAYER_TEXTURE1, PLAYER_TEXTURE2, PLAYER_TEXTURE3
-    global TREASURE_TEXTURE, CHARACTERS, MAZE
+    global TREASURE_TEXTURE, CHARACTERS, MAZE, PROFILER
 
-    # Инициализация pygame
-    pygame.init()
+    # Инициализация pygame. Без окна нужен только шрифт: полный pygame.init() поднимает SDL,
+    # а тот перехватывает SIGTERM, и пул процессов headless.py не может завершить воркеры
+    if headless:
+        pygame.font.init()
+    else:
+        pygame.init()
 
     # Размеры окна
     WIDTH, HEIGHT = 1050, 650
-    SCREEN = pygame.display.set_mode((WIDTH, HEIGHT))
-    pygame.display.set_caption("Лабиринт")
+    if headless:
+        SCREEN = None
+        load = blank_image
+    else:
+        SCREEN = pygame.display.set_mode((WIDTH, HEIGHT))
+        pygame.display.set_caption("Лабиринт")
+        load = assets.image
 
     # Цвета
     WHITE = (255, 255, 255)
@@ -34,24 +59,19 @@ def init():
     # Кадровая частота
     FPS = 30
     clock = pygame.time.Clock()
+    # замеры времени по стадиям кадра (включаются клавишей profiler.TOGGLE_KEY)
+    PROFILER = profiler.Profiler("level2")
     TILE_SIZE = 50
     # Шрифты
     FONT = pygame.font.Font(None, 36)
     # Загрузка текстур
-    WALL_TEXTURE = pygame.image.load("data/wall_texture.png")
-    WALL_TEXTURE = pygame.transform.scale(WALL_TEXTURE, (TILE_SIZE, TILE_SIZE))
-    ROAD_TEXTURE = pygame.image.load("data/road_texture.png")
-    ROAD_TEXTURE = pygame.transform.scale(ROAD_TEXTURE, (TILE_SIZE, TILE_SIZE))
-    ENEMY_TEXTURE = pygame.image.load("data/monster.png").convert_alpha()
-    ENEMY_TEXTURE = pygame.transform.scale(ENEMY_TEXTURE, (40, 40))  # Масштабируем текстуру до 40x40
-    PLAYER_TEXTURE1 = pygame.image.load("data/player1.png")
-    PLAYER_TEXTURE1 = pygame.transform.scale(PLAYER_TEXTURE1, (40, 40))
-    PLAYER_TEXTURE2 = pygame.image.load("data/player2(robin).png")
-    PLAYER_TEXTURE2 = pygame.transform.scale(PLAYER_TEXTURE2, (40, 40))
-    PLAYER_TEXTURE3 = pygame.image.load("data/player3(moustache).png")
-    PLAYER_TEXTURE3 = pygame.transform.scale(PLAYER_TEXTURE3, (40, 40))
-    TREASURE_TEXTURE = pygame.image.load("data/treasure.png").convert_alpha()
-    TREASURE_TEXTURE = pygame.transform.scale(TREASURE_TEXTURE, (40, 40))
+    WALL_TEXTURE = load("data/wall_texture.png", (TILE_SIZE, TILE_SIZE))
+    ROAD_TEXTURE = load("data/road_texture.png", (TILE_SIZE, TILE_SIZE))
+    ENEMY_TEXTURE = load("data/monster.png", (40, 40))  # Масштабируем текстуру до 40x40
+    PLAYER_TEXTURE1 = load("data/player1.png", (40, 40))
+    PLAYER_TEXTURE2 = load("data/player2(robin).png", (40, 40))
+    PLAYER_TEXTURE3 = load("data/player3(moustache).png", (40, 40))
+    TREASURE_TEXTURE = load("data/treasure.png", (40, 40))
 
     # Спрайты персонажей
     CHARACTERS = [
@@ -63,42 +83,26 @@ def init():
     CHARACTERS[1] = PLAYER_TEXTURE2
     CHARACTERS[2] = PLAYER_TEXTURE3
 
-    # Лабиринт
-    MAZE = [
-        "WWWWWWWWWWWWWWWWWWWWW",
-        "W     W       W     W",
-        "W WWW WWWWW W W WWW W",
-        "W W         W W W   W",
-        "W W WWWWWWW WWW W WWW",
-        "W W       W     W   W",
-        "W WWWWW W W WWWWW W W",
-        "W     W W W     W W W",
-        "WWW W W WWWWW W W W W",
-        "W   W W     W W   W W",
-        "W WWWWWWW W W WWWWW W",
-        "W         W W       W",
-        "WWWWWWWWWWWWWWWWWWWWW"
-    ]
+    # Лабиринт: карта в data/level2.map, W — стена, пробел — дорога
+    MAZE = levels.load("data/level2.map", levels.LEVEL2_TILES)
 
 
 # Класс игрока
 class Player(pygame.sprite.Sprite):
-    walkRight = [pygame.image.load('sprites/right1.png'), pygame.image.load('sprites/right2.png'),
-                 pygame.image.load('sprites/right3.png'), pygame.image.load('sprites/right4.png')]
+    walkRight = walkLeft = walkUp = walkDown = playerStand = None
 
-    walkLeft = [pygame.image.load('sprites/left1.png'), pygame.image.load('sprites/left2.png'),
-                pygame.image.load('sprites/left3.png'), pygame.image.load('sprites/left4.png')]
-
-    walkUp = [pygame.image.load('sprites/up1.png'), pygame.image.load('sprites/up2.png'),
-              pygame.image.load('sprites/up3.png'), pygame.image.load('sprites/up4.png')]
-
-    walkDown = [pygame.image.load('sprites/down1.png'), pygame.image.load('sprites/down2.png'),
-                pygame.image.load('sprites/down3.png'), pygame.image.load('sprites/down4.png')]
-
-    playerStand = pygame.image.load('sprites/down1.png')
+    # кадры грузятся при создании первого игрока, а не при импорте модуля
+    @classmethod
+    def load_sprites(cls):
+        if cls.playerStand is None:
+            frames = assets.walk_frames()
+            cls.walkRight, cls.walkLeft = frames["right"], frames["left"]
+            cls.walkUp, cls.walkDown = frames["up"], frames["down"]
+            cls.playerStand = frames["stand"]
 
     def __init__(self, character, x, y):
         super().__init__()
+        Player.load_sprites()
         self.image = Player.playerStand
         self.rect = self.image.get_rect()
         self.rect.topleft = (x, y)
@@ -150,11 +154,11 @@ class Player(pygame.sprite.Sprite):
 
         # Проверка столкновений со стенами
         self.rect.x += dx
-        if pygame.sprite.spritecollideany(self, walls):
+        if walls.collideany(self):
             self.rect.x -= dx
 
         self.rect.y += dy
-        if pygame.sprite.spritecollideany(self, walls):
+        if walls.collideany(self):
             self.rect.y -= dy
 
 
@@ -169,19 +173,19 @@ class Enemy(pygame.sprite.Sprite):
                 random.randint(0, WIDTH // TILE_SIZE - 1) * TILE_SIZE,
                 random.randint(0, HEIGHT // TILE_SIZE - 1) * TILE_SIZE
             )
-            if not pygame.sprite.spritecollideany(self, walls):
+            if not walls.collideany(self):
                 break
         self.direction = random.choice([(1, 0), (0, 1), (-1, 0), (0, -1)])
 
     def update(self, walls):
         dx, dy = self.direction[0] * 2, self.direction[1] * 2
         self.rect.x += dx
-        if pygame.sprite.spritecollideany(self, walls):
+        if walls.collideany(self):
             self.rect.x -= dx
             self.direction = random.choice([(1, 0), (0, 1), (-1, 0), (0, -1)])
 
         self.rect.y += dy
-        if pygame.sprite.spritecollideany(self, walls):
+        if walls.collideany(self):
             self.rect.y -= dy
             self.direction = random.choice([(1, 0), (0, 1), (-1, 0), (0, -1)])
 
@@ -203,7 +207,7 @@ class Treasure(pygame.sprite.Sprite):
             x = random.randint(0, WIDTH // TILE_SIZE - 1) * TILE_SIZE + TILE_SIZE // 2
             y = random.randint(0, HEIGHT // TILE_SIZE - 1) * TILE_SIZE + TILE_SIZE // 2
             self.rect.center = (x, y)
-            if not pygame.sprite.spritecollideany(self, walls):
+            if not walls.collideany(self):
                 distance = math.sqrt((x - player.rect.x) ** 2 + (y - player.rect.y) ** 2)
                 if distance > max_distance:
                     max_distance = distance
@@ -212,13 +216,28 @@ class Treasure(pygame.sprite.Sprite):
             self.rect.center = best_position
 
 
-# Класс стены
-class Wall(pygame.sprite.Sprite):
-    def __init__(self, x, y):
-        super().__init__()
-        self.image = WALL_TEXTURE
-        self.rect = self.image.get_rect()
-        self.rect.topleft = (x, y)
+# Сетка стен: проверяет только клетки под прямоугольником, а не все стены подряд
+class WallGrid:
+    def __init__(self, grid, tile_size):
+        self.tile_size = tile_size
+        self.rows = grid.height
+        self.cols = grid.width
+        self.walls = grid.cells == WALL
+
+    def collides(self, rect):
+        if rect.width <= 0 or rect.height <= 0:
+            return False
+        left = max(rect.left // self.tile_size, 0)
+        right = min((rect.right - 1) // self.tile_size, self.cols - 1)
+        top = max(rect.top // self.tile_size, 0)
+        bottom = min((rect.bottom - 1) // self.tile_size, self.rows - 1)
+        if left > right or top > bottom:
+            return False
+        return bool(self.walls[top:bottom + 1, left:right + 1].any())
+
+    # замена pygame.sprite.spritecollideany(sprite, walls)
+    def collideany(self, sprite):
+        return self.collides(sprite.rect)
 
 
 # Класс звезды
@@ -233,7 +252,7 @@ class Star(pygame.sprite.Sprite):
                 random.randint(0, WIDTH // TILE_SIZE - 1) * TILE_SIZE + TILE_SIZE // 4,
                 random.randint(0, HEIGHT // TILE_SIZE - 1) * TILE_SIZE + TILE_SIZE // 4
             )
-            if not pygame.sprite.spritecollideany(self, walls):
+            if not walls.collideany(self):
                 break
 
 
@@ -262,6 +281,9 @@ def end_screen(stars_collected):
                 sys.exit()
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_RETURN:
+                    # третий уровень импортируется только при переходе на него
+                    from main3 import Game
+
                     pygame.display.quit()
                     new_game = Game()
                     new_game.run()
@@ -295,78 +317,159 @@ def screen(stars_collected):
                     game()
 
 
-# Основная функция
-def game():
-    init()
-    character = Player.image
-    player = Player(character, TILE_SIZE, TILE_SIZE)
-    wall_group = pygame.sprite.Group()
-
-    # Создание стен лабиринта
-    for row_index, row in enumerate(MAZE):
-        for col_index, cell in enumerate(row):
-            if cell == "W":
-                wall = Wall(col_index * TILE_SIZE, row_index * TILE_SIZE)
-                wall_group.add(wall)
-
-    enemy = Enemy(wall_group)
-    treasure = Treasure(wall_group, player)
+# Логика уровня без отрисовки; её же гоняет headless.py
+class Level:
+    def __init__(self):
+        character = Player.image
+        self.player = Player(character, TILE_SIZE, TILE_SIZE)
+        # Сетка стен лабиринта для столкновений
+        self.walls = WallGrid(MAZE.grid, TILE_SIZE)
+
+        self.enemy = Enemy(self.walls)
+        self.treasure = Treasure(self.walls, self.player)
+
+        self.stars = pygame.sprite.Group()
+        for _ in range(3):
+            self.stars.add(Star(self.walls))
+
+        self.player_group = pygame.sprite.Group(self.player)
+        self.enemy_group = pygame.sprite.Group(self.enemy)
+        self.treasure_group = pygame.sprite.Group(self.treasure)
+        self.stars_collected = 0
+        for sprite in (self.player, self.enemy):
+            sprite.prev_pos = sprite.rect.topleft
+
+    # Один шаг логики: "win" — сокровище найдено, "loss" — игрок пойман, None — игра продолжается
+    def update(self, keys):
+        for sprite in (self.player, self.enemy):
+            sprite.prev_pos = sprite.rect.topleft
+        with PROFILER.scope("player"):
+            self.player.update(keys, self.walls)
+        with PROFILER.scope("enemies"):
+            self.enemy_group.update(self.walls)
 
-    stars = pygame.sprite.Group()
-    for _ in range(3):
-        stars.add(Star(wall_group))
-
-    player_group = pygame.sprite.Group(player)
-    enemy_group = pygame.sprite.Group(enemy)
-    treasure_group = pygame.sprite.Group(treasure)
+        # Проверка столкновений
+        with PROFILER.scope("collisions"):
+            if pygame.sprite.spritecollide(self.player, self.enemy_group, False):
+                return "loss"
+            if pygame.sprite.spritecollide(self.player, self.treasure_group, True):
+                return "win"
+
+            collected_stars = pygame.sprite.spritecollide(self.player, self.stars, True)
+            self.stars_collected += len(collected_stars)
+        return None
+
+
+# Спрайт рисуется между позицией на прошлом шаге логики и текущей
+def draw_smooth(sprite, alpha):
+    x = round(lerp(sprite.prev_pos[0], sprite.rect.x, alpha))
+    y = round(lerp(sprite.prev_pos[1], sprite.rect.y, alpha))
+    SCREEN.blit(sprite.image, (x, y))
+    return x, y
+
+
+# Лабиринт не меняется: плитки раскладываются на фон один раз одним вызовом blits,
+# а в кадре фон копируется на экран целиком
+def render_maze():
+    textures = {"wall": WALL_TEXTURE, "road": ROAD_TEXTURE}
+    background = pygame.Surface((WIDTH, HEIGHT)).convert()
+    background.fill(BLACK)
+    blits = []
+    for index, name in enumerate(MAZE.names):
+        if name is None:
+            continue
+        ys, xs = (MAZE.tiles == index).nonzero()
+        blits += [(textures[name], (x * TILE_SIZE, y * TILE_SIZE)) for x, y in zip(xs.tolist(), ys.tolist())]
+    background.blits(blits, doreturn=False)
+    return background
+
+
+# Основная функция; playback — запись партии, которую нужно показать вместо игры с клавиатуры
+def game(playback=None):
+    init()
+    if playback is not None:
+        random.seed(playback.seed)
+        recording = None
+    else:
+        recording = replay.begin(2, FPS)
+    level = Level()
+    player = level.player
+    tick = 0
+
+    shadow = lighting.get_mask([(100, 255)], soft=SOFT_LIGHT)
+    background = render_maze()
 
     running = True
-    stars_collected = 0
+    # Логика идёт с частотой FPS, а кадры рисуются чаще — с интерполяцией движения
+    timestep = FixedTimestep(FPS)
 
     while running:
-        SCREEN.fill(BLACK)
-
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
-
-        keys = pygame.key.get_pressed()
-        player.update(keys, wall_group)
-        enemy_group.update(wall_group)
-
-        # Рисуем лабиринт
-        for row_index, row in enumerate(MAZE):
-            for col_index, cell in enumerate(row):
-                x = col_index * TILE_SIZE
-                y = row_index * TILE_SIZE
-                if cell == "W":
-                    SCREEN.blit(WALL_TEXTURE, (x, y))
-                else:
-                    SCREEN.blit(ROAD_TEXTURE, (x, y))
-
-        player_group.draw(SCREEN)
-        enemy_group.draw(SCREEN)
-        treasure_group.draw(SCREEN)
-        stars.draw(SCREEN)
-
-        # Проверка столкновений
-        if pygame.sprite.spritecollide(player, enemy_group, False):
-            screen(stars_collected)
-            running = False
-        if pygame.sprite.spritecollide(player, treasure_group, True):
-            end_screen(stars_collected)
-            running = False
-
-        collected_stars = pygame.sprite.spritecollide(player, stars, True)
-        stars_collected += len(collected_stars)
-
-        # Затемнение экрана за пределами круга
-        shadow = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        shadow.fill((0, 0, 0, 255))  # Полностью черный цвет
-        pygame.draw.circle(shadow, (0, 0, 0, 0), player.rect.center, 100)
-        SCREEN.blit(shadow, (0, 0))
-
-        pygame.display.flip()
-        clock.tick(FPS)
-
+            elif event.type == pygame.KEYDOWN and event.key == profiler.TOGGLE_KEY:
+                PROFILER.toggle()
+            elif playback is not None:
+                target = replay.seek_key(event, tick, playback)
+                if target is not None:
+                    # назад — с начала, вперёд — шагами без отрисовки
+                    if target < tick:
+                        random.seed(playback.seed)
+                        level, tick = Level(), 0
+                        player = level.player
+                    while tick < target:
+                        tick += 1
+                        if level.update(playback.keys(tick - 1)):
+                            tick = len(playback)
+
+        for _ in timestep.steps():
+            if playback is not None:
+                # запись доиграна — стоим на последнем кадре
+                if tick < len(playback):
+                    tick += 1
+                    if level.update(playback.keys(tick - 1)):
+                        tick = len(playback)
+                continue
+            keys = pygame.key.get_pressed()
+            if recording is not None:
+                recording.record(keys)
+            tick += 1
+            status = level.update(keys)
+            if status:
+                replay.save(recording)
+                PROFILER.save()
+                storage.record_run(2, status, tick, FPS, level.stars_collected)
+            if status == "loss":
+                screen(level.stars_collected)
+                running = False
+                break
+            if status == "win":
+                end_screen(level.stars_collected)
+                running = False
+                break
+        if not running:
+            break
+
+        with PROFILER.scope("maze"):
+            SCREEN.blit(background, (0, 0))
+
+        with PROFILER.scope("sprites"):
+            player_pos = draw_smooth(player, timestep.alpha)
+            draw_smooth(level.enemy, timestep.alpha)
+            level.treasure_group.draw(SCREEN)
+            level.stars.draw(SCREEN)
+
+        # Затемнение экрана за пределами круга (полностью черный цвет)
+        with PROFILER.scope("shadow"):
+            shadow.draw(SCREEN, (player_pos[0] + player.rect.width // 2, player_pos[1] + player.rect.height // 2))
+        PROFILER.draw(SCREEN)
+
+        with PROFILER.scope("flip"):
+            pygame.display.flip()
+        clock.tick(RENDER_FPS)
+        PROFILER.frame()
+
+    if playback is None:
+        replay.save(recording)
+    PROFILER.save()
     pygame.quit()
@@ -1,9 +1,22 @@
 import pygame
 import sys
-from collections import deque
 import random
 
-FPS = 30
+import numpy as np
+
+import assets
+import lighting
+import mazegen
+import particles
+import pathfinding
+import profiler
+import replay
+import storage
+from timestep import FixedTimestep, RENDER_FPS, lerp
+from grid import Grid, FLOOR, WALL, EXIT
+from world import ChunkedWorld
+
+FPS = 30  # частота шагов логики; отрисовка ограничена timestep.RENDER_FPS
 
 # Цвета
 WHITE = (255, 255, 255)
@@ -11,175 +24,166 @@ RED = (255, 0, 0)
 BLUE = (0, 0, 255)
 SNOW_WHITE = (240, 240, 240)
 SNOW_WALL = (200, 220, 255)
-PIPES_IMAGE = pygame.image.load("data/pipes.png")
 
 # Размер лабиринта
 MAZE_WIDTH = 39
 MAZE_HEIGHT = 19
 
-# Фиксируем генерацию лабиринта
-random.seed(42)
-
-
-def generate_maze(width, height):
-    maze = [[1 for _ in range(width)] for _ in range(height)]
-    start_x, start_y = 1, 1
-    maze[start_y][start_x] = 0
-    walls = [(start_x + dx, start_y + dy) for dx, dy in [(2, 0), (-2, 0), (0, 2), (0, -2)] if
-             0 <= start_x + dx < width and 0 <= start_y + dy < height]
-    random.shuffle(walls)
-
-    while walls:
-        x, y = walls.pop()
-        if maze[y][x] == 1:
-            open_neighbors = [(x + dx * 2, y + dy * 2) for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1)] if
-                              0 <= x + dx * 2 < width and 0 <= y + dy * 2 < height]
-            random.shuffle(open_neighbors)
-
-            for nx, ny in open_neighbors:
-                if maze[ny][nx] == 0:
-                    maze[y][x] = 0
-                    maze[(y + ny) // 2][(x + nx) // 2] = 0
-                    walls.extend([(x + dx, y + dy) for dx, dy in [(2, 0), (-2, 0), (0, 2), (0, -2)] if
-                                  0 <= x + dx < width and 0 <= y + dy < height])
-                    break
+# Алгоритм генерации: prim, kruskal, backtracker, eller или wilson (см. mazegen.ALGORITHMS)
+MAZE_ALGORITHM = "prim"
+
+# Клеток про запас вокруг экрана в кэше лабиринта и максимальная сторона кэша в пикселях
+MAZE_CACHE_MARGIN = 8
+MAZE_CACHE_LIMIT = 4096
+
+# Радиус, в котором появляется ледоруб в бесконечном режиме
+ICE_PICK_RADIUS = 10
+
+# Бесконечный режим: seed мира и папка для изменённых чанков
+WORLD_SEED = 42
+WORLD_SAVE_DIR = "saves/world"
+
+# Мягкий радиальный край света вместо резкого круга
+SOFT_LIGHT = False
+
+# Число снежинок и множитель плотности (на слабых машинах можно уменьшить);
+# при SNOW_AUTO_DENSITY снежинок становится меньше, если кадр не укладывается во время
+SNOW_FLAKES = 500
+SNOW_DENSITY = 1.0
+SNOW_AUTO_DENSITY = True
 
-    for _ in range(int(width * height * 0.1)):  # Дополнительно добавляем проходы
-        x, y = random.randint(1, width - 2), random.randint(1, height - 2)
-        if maze[y][x] == 1:
-            maze[y][x] = 0
+# Количество монстров на уровне
+MONSTER_COUNT = 1
 
-    for x in range(width):
-        maze[0][x] = 1
-        maze[height - 1][x] = 1
-    for y in range(height):
-        maze[y][0] = 1
-        maze[y][width - 1] = 1
+
+def generate_maze(width, height, algorithm=MAZE_ALGORITHM, seed=None):
+    if seed is None:
+        seed = random.getrandbits(64)
+    maze = mazegen.generate(width, height, algorithm, seed)
+
+    # Дополнительно добавляем проходы
+    rng = np.random.default_rng(seed)
+    count = int(width * height * 0.1)
+    maze[rng.integers(1, height - 1, count), rng.integers(1, width - 1, count)] = FLOOR
+
+    maze[[0, height - 1], :] = WALL
+    maze[:, [0, width - 1]] = WALL
 
     # Добавляем выход в правом нижнем углу
-    maze[height - 2][width - 2] = 2  # 2 — это значение выхода
+    maze[height - 2, width - 2] = EXIT
     return maze
 
 
-maze = generate_maze(MAZE_WIDTH, MAZE_HEIGHT)
+maze = None
+
+
+# Лабиринт строится при первом запуске уровня, а не при импорте модуля
+def get_maze():
+    global maze
+    if maze is None:
+        # Фиксируем генерацию лабиринта, не трогая общий random (его сеет запись партии)
+        maze = generate_maze(MAZE_WIDTH, MAZE_HEIGHT, seed=random.Random(42).getrandbits(64))
+    return maze
 
 
 class Hero:
-    def __init__(self, x, y):
+    def __init__(self, x, y, grid=None):
         self.x = x
         self.y = y
+        self.maze = grid if grid is not None else get_maze()
         self.move_delay = 10  # Задержка движения героя
         self.frame_counter = 0
 
     def move(self, dx, dy):
         new_x = self.x + dx
         new_y = self.y + dy
-        if 0 <= new_x < MAZE_WIDTH and 0 <= new_y < MAZE_HEIGHT and (
-                maze[new_y][new_x] == 0 or maze[new_y][new_x] == 2):
+        if self.maze.in_bounds(new_x, new_y) and self.maze[new_y, new_x] in (FLOOR, EXIT):
             self.x, self.y = new_x, new_y
 
 
 class Monster:
-    def __init__(self, x, y):
+    def __init__(self, x, y, path_finder=None, grid=None):
         self.x = x
         self.y = y
+        self.maze = grid if grid is not None else get_maze()
         self.move_delay = 20
         self.frame_counter = 0
+        self.prev_x, self.prev_y = x, y  # позиция на прошлом шаге, для плавной отрисовки
+        # None — шаг по общему полю расстояний, иначе функция поиска пути (pathfinding.astar, pathfinding.jps)
+        self.path_finder = path_finder
 
-    def move(self, hero):
+    def move(self, hero, field):
         self.frame_counter += 1
         if self.frame_counter >= self.move_delay:
             self.frame_counter = 0
-            path = self.bfs((self.x, self.y), (hero.x, hero.y))
-            if path:
-                self.x, self.y = path[0]
+            if self.path_finder is None:
+                field.set_goal(hero.x, hero.y)
+                step = field.next_step(self.x, self.y)
+            else:
+                path = self.path_finder(self.maze, (self.x, self.y), (hero.x, hero.y))
+                step = path[0] if path else None
+            if step:
+                self.x, self.y = step
 
     def bfs(self, start, goal):
-        queue = deque([start])
-        visited = {start: None}
-
-        while queue:
-            current = queue.popleft()
-            if current == goal:
-                break
-
-            x, y = current
-            neighbors = [(x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)]
-            for neighbor in neighbors:
-                nx, ny = neighbor
-                if MAZE_WIDTH > nx >= 0 == maze[ny][nx] and 0 <= ny < MAZE_HEIGHT and neighbor not in visited:
-                    queue.append(neighbor)
-                    visited[neighbor] = current
-
-        path = []
-        current = goal
-        while current != start:
-            if current not in visited:
-                return []
-            path.append(current)
-            current = visited[current]
-        path.reverse()
-        return path
+        return pathfinding.bfs(self.maze, start, goal)
 
 
 class Game:
-    walkRight = [pygame.image.load('sprites/right1.png'), pygame.image.load('sprites/right2.png'),
-                 pygame.image.load('sprites/right3.png'), pygame.image.load('sprites/right4.png')]
-    for i in range(4):
-        walkRight[i] = pygame.transform.smoothscale(walkRight[i], (100, 100))
-
-    walkLeft = [pygame.image.load('sprites/left1.png'), pygame.image.load('sprites/left2.png'),
-                pygame.image.load('sprites/left3.png'), pygame.image.load('sprites/left4.png')]
-    for i in range(4):
-        walkLeft[i] = pygame.transform.smoothscale(walkLeft[i], (100, 100))
-
-    walkUp = [pygame.image.load('sprites/up1.png'), pygame.image.load('sprites/up2.png'),
-              pygame.image.load('sprites/up3.png'), pygame.image.load('sprites/up4.png')]
-    for i in range(4):
-        walkUp[i] = pygame.transform.smoothscale(walkUp[i], (100, 100))
-
-    walkDown = [pygame.image.load('sprites/down1.png'), pygame.image.load('sprites/down2.png'),
-                pygame.image.load('sprites/down3.png'), pygame.image.load('sprites/down4.png')]
-    for i in range(4):
-        walkDown[i] = pygame.transform.smoothscale(walkDown[i], (100, 100))
-
-    playerStand = pygame.image.load('sprites/down1.png')
-    playerStand = pygame.transform.smoothscale(playerStand, (100, 100))
-
-    def __init__(self):
-        pygame.init()
-        infoobject = pygame.display.Info()
-        self.WIDTH, self.HEIGHT = infoobject.current_w, infoobject.current_h
-        print(self.WIDTH, self.HEIGHT)
-        self.screen = pygame.display.set_mode((self.WIDTH, self.HEIGHT))
-        pygame.display.set_caption("Снежный лабиринт")
-        self.CELL_SIZE = min(self.WIDTH // (MAZE_WIDTH // 3), self.HEIGHT // (MAZE_HEIGHT // 3))
-        print(self.CELL_SIZE)
+    walkRight = walkLeft = walkUp = walkDown = playerStand = None
+
+    # кадры героя грузятся при запуске уровня, а не при импорте модуля
+    @classmethod
+    def load_sprites(cls):
+        if cls.playerStand is None:
+            frames = assets.walk_frames((100, 100), smooth=True)
+            cls.walkRight, cls.walkLeft = frames["right"], frames["left"]
+            cls.walkUp, cls.walkDown = frames["up"], frames["down"]
+            cls.playerStand = frames["stand"]
+
+    # headless — только логика, без окна и картинок (для headless.py);
+    # maze_seed — свой лабиринт вместо стандартного; playback — запись партии для воспроизведения;
+    # size — размер окна (по умолчанию во весь экран)
+    def __init__(self, endless=False, headless=False, maze_seed=None, playback=None, size=None):
+        self.headless = headless
+        self.endless = endless
+        self.maze_seed = maze_seed
+        self.playback = playback
+        self.profiler = profiler.Profiler("level3")
+        if not headless:
+            self.init_graphics(size)
         self.clock = pygame.time.Clock()
-        self.hero = Hero(1, 1)
-        self.monster = Monster(MAZE_WIDTH - 2, MAZE_HEIGHT - 2)
-
-        self.wall_texture = pygame.image.load("data/wall.png")
-        self.wall_texture = pygame.transform.smoothscale(self.wall_texture, (self.CELL_SIZE, self.CELL_SIZE))
+        self.init_state()
+
+    # Состояние партии; при перемотке записи назад строится заново
+    def init_state(self):
+        # headless-партии сеет тот, кто их запускает
+        self.recording = None
+        if self.playback is not None:
+            random.seed(self.playback.seed)
+        elif not self.headless and not self.endless:
+            self.recording = replay.begin(3, FPS, self.maze_seed)
+        self.tick = 0
+        self.pressed = set()  # клавиши-действия, нажатые с прошлого шага
+        # В бесконечном режиме мир строится чанками вокруг героя, выхода и монстров там нет
+        if self.endless:
+            self.maze = ChunkedWorld(WORLD_SEED, save_dir=WORLD_SAVE_DIR)
+        elif self.maze_seed is not None:
+            self.maze = generate_maze(MAZE_WIDTH, MAZE_HEIGHT, seed=self.maze_seed)
+        else:
+            # копия, чтобы пробитые стены не переходили в следующую партию
+            self.maze = Grid.from_array(get_maze().cells.copy())
+        self.hero = Hero(1, 1, self.maze)
+        if self.endless:
+            self.field = None
+            self.monsters = []
+        else:
+            self.field = pathfinding.DistanceField(self.maze)
+            self.monsters = self.spawn_monsters(MONSTER_COUNT)
 
-        self.floor_texture = pygame.image.load("data/floor.png")
-        self.floor_texture = pygame.transform.smoothscale(self.floor_texture, (self.CELL_SIZE, self.CELL_SIZE))
-
-        self.image = self.playerStand
-        self.image = pygame.transform.smoothscale(self.image, (100, 100))
-
-        self.monster_texture = pygame.image.load("data/monster.webp").convert_alpha()
-        self.monster_texture = pygame.transform.smoothscale(self.monster_texture, (self.CELL_SIZE, self.CELL_SIZE))
-
-        self.ice_pick_texture = pygame.image.load("data/ice_pick.webp").convert_alpha()
-        self.ice_pick_texture = pygame.transform.smoothscale(self.ice_pick_texture, (self.CELL_SIZE, self.CELL_SIZE))
-
-        self.decoration = pygame.image.load("data/exit.webp").convert_alpha()
-        self.decoration = pygame.transform.smoothscale(self.decoration, (self.CELL_SIZE, self.CELL_SIZE))
-        self.snowstorm = self.create_snowstorm(500)
-        self.visibility_radius = self.CELL_SIZE * 2
         self.camera_x = 1
         self.camera_y = 1
+        self.prev_camera = (self.camera_x, self.camera_y)
         self.ice_pick = None
         self.has_ice_pick = False
         self.ice_pick_pos = None
@@ -189,21 +193,94 @@ class Game:
         self.left = False
         self.up = False
         self.down = False
+        # Статичный слой лабиринта рисуется один раз, дальше только перерисовываются изменённые клетки
+        self.maze_rect = pygame.Rect(0, 0, 0, 0)  # какие клетки лежат в кэше
+        self.maze_surface = None
+
+    def init_graphics(self, size=None):
+        pygame.init()
+        if size is None:
+            infoobject = pygame.display.Info()
+            size = infoobject.current_w, infoobject.current_h
+        self.WIDTH, self.HEIGHT = size
+        print(self.WIDTH, self.HEIGHT)
+        self.screen = pygame.display.set_mode((self.WIDTH, self.HEIGHT))
+        pygame.display.set_caption("Снежный лабиринт")
+        self.CELL_SIZE = min(self.WIDTH // (MAZE_WIDTH // 3), self.HEIGHT // (MAZE_HEIGHT // 3))
+        print(self.CELL_SIZE)
+        self.load_sprites()
+
+        cell = (self.CELL_SIZE, self.CELL_SIZE)
+        self.wall_texture = assets.image("data/wall.png", cell, smooth=True)
+        self.floor_texture = assets.image("data/floor.png", cell, smooth=True)
+
+        self.image = self.playerStand
+
+        self.monster_texture = assets.image("data/monster.webp", cell, smooth=True)
+        self.ice_pick_texture = assets.image("data/ice_pick.webp", cell, smooth=True)
+        self.decoration = assets.image("data/exit.webp", cell, smooth=True)
+        # у снега свой генератор, иначе запись партии разойдётся с воспроизведением без окна
+        self.snowstorm = particles.Snowstorm(self.WIDTH, self.HEIGHT, int(SNOW_FLAKES * SNOW_DENSITY))
+        self.visibility_radius = self.CELL_SIZE * 2
+        self.light = lighting.get_mask([(self.visibility_radius, 180), (self.visibility_radius * 1.2, 150)],
+                                       soft=SOFT_LIGHT)
+
+    def spawn_monsters(self, count):
+        # Первый монстр стоит у выхода, остальные — на случайных свободных клетках подальше от героя
+        monsters = [Monster(self.maze.width - 2, self.maze.height - 2, grid=self.maze)]
+        free_cells = [(x, y) for x, y in self.maze.open_cells((FLOOR,))
+                      if abs(x - self.hero.x) + abs(y - self.hero.y) > 5]
+        for _ in range(count - 1):
+            monsters.append(Monster(*random.choice(free_cells), grid=self.maze))
+        return monsters
+
+    def update_monsters(self):
+        # В бесконечном режиме монстров и поля расстояний нет
+        if self.field is None:
+            return
+        # Поле расстояний считается один раз на позицию героя, все монстры ходят по нему.
+        # Большое поле перестраивается частями за несколько шагов (pathfinding.REBUILD_LAYERS)
+        self.field.set_goal(self.hero.x, self.hero.y)
+        self.field.update()
+        for monster in self.monsters:
+            monster.move(self.hero, self.field)
+
+    def caught_by_monster(self):
+        for monster in self.monsters:
+            if self.hero.x == monster.x and self.hero.y == monster.y:
+                return True
+        return False
+
+    # "win" — герой у выхода, "loss" — пойман монстром, None — игра продолжается
+    def status(self):
+        if self.maze[self.hero.y, self.hero.x] == EXIT:
+            return "win"
+        if self.caught_by_monster():
+            return "loss"
+        return None
 
     def spawn_ice_pick(self):
         # Генерируем случайную позицию для ледоруба на поле (не на стенке)
         if not self.ice_pick_pos:
-            while True:
-                xx = random.randint(1, MAZE_WIDTH)
-                yy = random.randint(1, MAZE_HEIGHT)
-                if maze[yy][xx] == 0:
-                    self.ice_pick_pos = xx, yy
-                    break
+            if self.endless:
+                # В бесконечном мире ищем место рядом с героем; если пола в радиусе нет, расширяем поиск
+                radius = ICE_PICK_RADIUS
+                while True:
+                    left, top = self.hero.x - radius, self.hero.y - radius
+                    view = self.maze.window(left, top, radius * 2 + 1, radius * 2 + 1)
+                    ys, xs = np.nonzero(view == FLOOR)
+                    if len(xs):
+                        break
+                    radius = radius * 2 + 1
+                index = random.randrange(len(xs))
+                self.ice_pick_pos = left + int(xs[index]), top + int(ys[index])
+            else:
+                self.ice_pick_pos = random.choice(self.maze.open_cells((FLOOR,)))
 
-    def draw_ice_pick(self):
+    def draw_ice_pick(self, camera_x, camera_y):
         if self.ice_pick_pos:
-            ice_pick_screen_x = (self.ice_pick_pos[0] - self.camera_x) * self.CELL_SIZE + self.WIDTH // 2
-            ice_pick_screen_y = (self.ice_pick_pos[1] - self.camera_y) * self.CELL_SIZE + self.HEIGHT // 2
+            ice_pick_screen_x = (self.ice_pick_pos[0] - camera_x) * self.CELL_SIZE + self.WIDTH // 2
+            ice_pick_screen_y = (self.ice_pick_pos[1] - camera_y) * self.CELL_SIZE + self.HEIGHT // 2
             self.screen.blit(self.ice_pick_texture, (ice_pick_screen_x, ice_pick_screen_y))
 
     def use_ice_pick(self):
@@ -213,9 +290,15 @@ class Game:
             # Проверяем соседние клетки
             for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
                 new_x, new_y = hero_x + dx, hero_y + dy
-                if 0 <= new_x < MAZE_WIDTH and 0 <= new_y < MAZE_HEIGHT and maze[new_y][new_x] == 1:
-                    maze[new_y][new_x] = 0  # Пробиваем стену
+                if self.maze.in_bounds(new_x, new_y) and self.maze[new_y, new_x] == WALL:
+                    self.maze[new_y, new_x] = FLOOR  # Пробиваем стену
+                    if not self.headless:
+                        self.redraw_cell(new_x, new_y)
+                    if self.field:
+                        self.field.open_cell(new_x, new_y)
                     self.has_ice_pick = False  # Убираем ледоруб
+                    if self.endless:
+                        self.spawn_ice_pick()
                     return  # Ледоруб использован, выходим
 
     def draw_ui(self):
@@ -224,75 +307,91 @@ class Game:
             ice_pick_rect = self.ice_pick_texture.get_rect(topleft=(20, self.HEIGHT - 180))
             self.screen.blit(self.ice_pick_texture, ice_pick_rect)
 
+    def build_maze_surface(self, camera_x, camera_y):
+        # Маленький лабиринт кэшируется целиком, большой — окном вокруг камеры с запасом
+        if not self.endless and max(self.maze.width, self.maze.height) * self.CELL_SIZE <= MAZE_CACHE_LIMIT:
+            rect = pygame.Rect(0, 0, self.maze.width, self.maze.height)
+        else:
+            cols = self.WIDTH // self.CELL_SIZE + 2 + MAZE_CACHE_MARGIN * 2
+            rows = self.HEIGHT // self.CELL_SIZE + 2 + MAZE_CACHE_MARGIN * 2
+            rect = pygame.Rect(0, 0, cols, rows)
+            rect.center = (camera_x, camera_y)
+            if not self.endless:
+                rect = rect.clip(0, 0, self.maze.width, self.maze.height)
+        self.maze_rect = rect
+        self.maze_surface = pygame.Surface((rect.width * self.CELL_SIZE, rect.height * self.CELL_SIZE)).convert()
+        self.maze_surface.fill(SNOW_WHITE)
+
+        view = self.maze.window(rect.x, rect.y, rect.width, rect.height)
+        blits = []
+        for mask, texture in ((view == WALL, self.wall_texture), (view == EXIT, self.decoration),
+                              ((view != WALL) & (view != EXIT), self.floor_texture)):
+            ys, xs = mask.nonzero()
+            blits += [(texture, (x * self.CELL_SIZE, y * self.CELL_SIZE)) for x, y in zip(xs.tolist(), ys.tolist())]
+        self.maze_surface.blits(blits, False)
+
+    def cell_texture(self, cell):
+        if cell == WALL:
+            return self.wall_texture
+        elif cell == EXIT:  # Отрисовка выхода
+            return self.decoration
+        return self.floor_texture
+
+    def redraw_cell(self, x, y):
+        # Обновляем в кэше только одну клетку (например, после ледоруба)
+        if not self.maze_rect.collidepoint(x, y):
+            return
+        rect = pygame.Rect((x - self.maze_rect.x) * self.CELL_SIZE, (y - self.maze_rect.y) * self.CELL_SIZE,
+                           self.CELL_SIZE, self.CELL_SIZE)
+        self.maze_surface.fill(SNOW_WHITE, rect)
+        self.maze_surface.blit(self.cell_texture(self.maze[y, x]), rect)
+
     def draw_maze(self, camera_x, camera_y):
-        for y, row in enumerate(maze):
-            for x, cell in enumerate(row):
-                screen_x = (x - camera_x) * self.CELL_SIZE + self.WIDTH // 2
-                screen_y = (y - camera_y) * self.CELL_SIZE + self.HEIGHT // 2
-                if 0 <= screen_x < self.WIDTH and 0 <= screen_y < self.HEIGHT:
-                    if cell == 1:
-                        self.screen.blit(self.wall_texture, (screen_x, screen_y))
-                    elif cell == 2:  # Отрисовка выхода
-                        self.screen.blit(self.decoration, (screen_x, screen_y))
-                    else:
-                        self.screen.blit(self.floor_texture, (screen_x, screen_y))
-
-    def create_snowstorm(self, count):
-        snowflakes = []
-        for _ in range(count):
-            x = random.randint(0, self.WIDTH)
-            y = random.randint(0, self.HEIGHT)
-            size = random.randint(2, 6)  # Размер снежинки
-            speed_x = random.uniform(-2, 2)  # Горизонтальное движение
-            speed_y = random.uniform(1, 5)  # Вертикальное падение
-            opacity = random.randint(150, 255)  # Прозрачность (чтобы снежинки накладывались)
-            snowflakes.append([x, y, size, speed_x, speed_y, opacity])
-        return snowflakes
+        # Какие клетки попадают на экран; если кэш их не покрывает — перестраиваем его
+        visible = pygame.Rect(int(camera_x) - self.WIDTH // 2 // self.CELL_SIZE - 1,
+                              int(camera_y) - self.HEIGHT // 2 // self.CELL_SIZE - 1,
+                              self.WIDTH // self.CELL_SIZE + 3, self.HEIGHT // self.CELL_SIZE + 3)
+        if not self.endless:
+            visible = visible.clip(0, 0, self.maze.width, self.maze.height)
+        if self.maze_surface is None or not self.maze_rect.contains(visible):
+            self.build_maze_surface(int(camera_x), int(camera_y))
+
+        # Вырезаем из готового слоя окно камеры и рисуем его одним blit
+        origin_x = round((camera_x - self.maze_rect.x) * self.CELL_SIZE) - self.WIDTH // 2
+        origin_y = round((camera_y - self.maze_rect.y) * self.CELL_SIZE) - self.HEIGHT // 2
+        area = pygame.Rect(origin_x, origin_y, self.WIDTH, self.HEIGHT).clip(self.maze_surface.get_rect())
+        if area.width and area.height:
+            self.screen.blit(self.maze_surface, (area.x - origin_x, area.y - origin_y), area)
 
     def update_snowstorm(self):
-        for flake in self.snowstorm:
-            flake[0] += flake[3]  # Двигаем по X
-            flake[1] += flake[4]  # Двигаем по Y
-
-            # Если снежинка вышла за экран — вернуть наверх
-            if flake[1] > self.HEIGHT or flake[0] < 0 or flake[0] > self.WIDTH:
-                flake[0] = random.randint(0, self.WIDTH)
-                flake[1] = random.randint(-50, -10)  # Начинает падать с верху
-                flake[3] = random.uniform(-2, 2)  # Новый случайный горизонтальный сдвиг
-                flake[4] = random.uniform(1, 5)  # Новая скорость падения
+        self.snowstorm.update()
 
     def draw_snowstorm(self):
-        snowstorm_layer = pygame.Surface((self.WIDTH, self.HEIGHT), pygame.SRCALPHA)
-
-        for flake in self.snowstorm:
-            x, y, size, _, _, opacity = flake
-
-            # Проверяем, находится ли снежинка в центре экрана (где герой)
-            dx = x - self.WIDTH // 2
-            dy = y - self.HEIGHT // 2
-            distance = (dx ** 2 + dy ** 2) ** 0.5
-
-            if distance < 100:  # В центре (радиус 100px) делаем снежинки более прозрачными
-                opacity = max(50, opacity - 150)
-
-            pygame.draw.circle(snowstorm_layer, (255, 255, 255, opacity), (int(x), int(y)), size)
-
-        self.screen.blit(snowstorm_layer, (0, 0))  # Отрисовываем поверх лабиринта
+        # Отрисовываем поверх лабиринта; в центре (где герой) снежинки более прозрачные
+        self.snowstorm.draw(self.screen, (self.WIDTH // 2, self.HEIGHT // 2))
 
     def draw_visibility_mask(self):
-        mask = pygame.Surface((self.WIDTH, self.HEIGHT), pygame.SRCALPHA)
-        mask.fill((0, 0, 0, 180))
-        hero_screen_x = self.WIDTH // 2
-        hero_screen_y = self.HEIGHT // 2
-        pygame.draw.circle(mask, (0, 0, 0, 0), (hero_screen_x, hero_screen_y), self.visibility_radius)
-        self.screen.blit(mask, (0, 0))
+        # Видимость и освещение сведены в одну заранее посчитанную маску вокруг героя
+        self.light.draw(self.screen, (self.WIDTH // 2, self.HEIGHT // 2))
 
     def update_camera(self):
         return self.hero.x, self.hero.y
 
-    def handle_events(self):
-        pygame.event.pump()
-        keys = pygame.key.get_pressed()
+    # Клавиши на этом шаге: движение — зажатые сейчас, действия — нажатые с прошлого шага
+    def read_input(self):
+        held = pygame.key.get_pressed()
+        keys = replay.Keys(key for key in (pygame.K_w, pygame.K_s, pygame.K_a, pygame.K_d) if held[key])
+        keys.pressed |= self.pressed
+        self.pressed = set()
+        return keys
+
+    def update_hero(self, keys):
+        if keys[pygame.K_e]:
+            if (self.hero.x, self.hero.y) == self.ice_pick_pos:
+                self.has_ice_pick = True
+                self.ice_pick_pos = None
+        if keys[pygame.K_SPACE]:
+            self.use_ice_pick()
 
         self.hero.frame_counter += 1
         if self.hero.frame_counter >= self.hero.move_delay:
@@ -313,6 +412,8 @@ class Game:
                 self.right = True
                 self.left = self.up = self.down = False
             self.hero.frame_counter = 0
+            if self.headless:
+                return  # анимация нужна только на экране
 
             self.animCount += 1
             if self.animCount >= 30:
@@ -334,26 +435,26 @@ class Game:
                 self.up = False
                 self.down = False
 
+    def handle_events(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 return False
-            if event.type == pygame.KEYDOWN and event.key == pygame.K_e:
-                if (self.hero.x, self.hero.y) == self.ice_pick_pos:
-                    self.has_ice_pick = True
-                    self.ice_pick_pos = None
-            if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
-                self.use_ice_pick()
+            if event.type == pygame.KEYDOWN and event.key == profiler.TOGGLE_KEY:
+                self.profiler.toggle()
+            if self.playback is not None:
+                target = replay.seek_key(event, self.tick, self.playback)
+                if target is not None:
+                    self.seek(target)
+            elif event.type == pygame.KEYDOWN and event.key in (pygame.K_e, pygame.K_SPACE):
+                self.pressed.add(event.key)
         return True
 
-    def draw_lighting_effect(self):
-        dark_surface = pygame.Surface((self.WIDTH, self.HEIGHT), pygame.SRCALPHA)
-        dark_surface.fill((0, 0, 0, 150))  # Затемнение
-
-        # Создаем плавно исчезающий круг света вокруг героя
-        hero_pos = (self.WIDTH // 2, self.HEIGHT // 2)
-        pygame.draw.circle(dark_surface, (0, 0, 0, 0), hero_pos, self.visibility_radius * 1.2)
-
-        self.screen.blit(dark_surface, (0, 0))
+    # Перемотка записи: назад — партия начинается заново, затем шаги без отрисовки до нужного
+    def seek(self, target):
+        if target < self.tick:
+            self.init_state()
+        while self.tick < target and self.status() is None:
+            self.update(self.playback.keys(self.tick))
 
     def end_screen(self):
         FONT = pygame.font.Font(None, 36)
@@ -384,11 +485,10 @@ class Game:
         SCREEN = pygame.display.set_mode((WIDTH, HEIGHT))
         pygame.display.set_caption("Победа")
         SCREEN.fill((0, 0, 0))
-        image = PIPES_IMAGE
+        image = assets.image("data/pipes.png", (300, 300))
         text = FONT.render("Победа!", True, WHITE)
         sub_text = FONT.render("Вы доказали свою силу!", True, WHITE)
 
-        image = pygame.transform.scale(image, (300, 300))
         SCREEN.blit(image, (WIDTH // 2 - 150, HEIGHT // 2 - 150))
         SCREEN.blit(text, (WIDTH // 2 - text.get_width() // 2, HEIGHT - 100))
         SCREEN.blit(sub_text, (WIDTH // 2 - sub_text.get_width() // 2, HEIGHT - 50))
@@ -401,48 +501,104 @@ class Game:
                     pygame.quit()
                     sys.exit()
 
-    def run(self):
-        running = True
-        while running:
-            running = self.handle_events()
-            self.monster.move(self.hero)
-            self.camera_x, self.camera_y = self.update_camera()
-
+    def update(self, keys=None):
+        # Один шаг логики; прошлые позиции запоминаем, чтобы плавно рисовать между шагами
+        if keys is None:
+            keys = self.read_input()
+        if self.recording is not None:
+            self.recording.record(keys)
+        self.tick += 1
+        self.prev_camera = (self.camera_x, self.camera_y)
+        for monster in self.monsters:
+            monster.prev_x, monster.prev_y = monster.x, monster.y
+        with self.profiler.scope("hero"):
+            self.update_hero(keys)
+        with self.profiler.scope("monsters"):
+            self.update_monsters()
+        self.camera_x, self.camera_y = self.update_camera()
+        if not self.headless:
+            with self.profiler.scope("snow update"):
+                self.update_snowstorm()
+        return self.status()
+
+    def draw(self, alpha):
+        camera_x = lerp(self.prev_camera[0], self.camera_x, alpha)
+        camera_y = lerp(self.prev_camera[1], self.camera_y, alpha)
+
+        with self.profiler.scope("maze"):
             self.screen.fill(SNOW_WHITE)
-            self.draw_maze(self.camera_x, self.camera_y)
+            self.draw_maze(camera_x, camera_y)
+        with self.profiler.scope("light"):
             self.draw_visibility_mask()
-            self.draw_lighting_effect()
 
+        with self.profiler.scope("sprites"):
             # Отрисовка героя
             hero_screen_x = self.WIDTH // 2
             hero_screen_y = self.HEIGHT // 2
             self.screen.blit(self.image, (hero_screen_x, hero_screen_y))
 
-            # Отрисовка монстра
-            monster_screen_x = (self.monster.x - self.camera_x) * self.CELL_SIZE + self.WIDTH // 2
-            monster_screen_y = (self.monster.y - self.camera_y) * self.CELL_SIZE + self.HEIGHT // 2
-            self.screen.blit(self.monster_texture, (monster_screen_x, monster_screen_y))
+            # Отрисовка монстров
+            for monster in self.monsters:
+                monster_x = lerp(monster.prev_x, monster.x, alpha)
+                monster_y = lerp(monster.prev_y, monster.y, alpha)
+                monster_screen_x = (monster_x - camera_x) * self.CELL_SIZE + self.WIDTH // 2
+                monster_screen_y = (monster_y - camera_y) * self.CELL_SIZE + self.HEIGHT // 2
+                self.screen.blit(self.monster_texture, (monster_screen_x, monster_screen_y))
             self.draw_ui()
-            self.draw_ice_pick()
+            self.draw_ice_pick(camera_x, camera_y)
 
-            self.update_snowstorm()
+        with self.profiler.scope("snow"):
             self.draw_snowstorm()
+        self.profiler.draw(self.screen)
 
+        with self.profiler.scope("flip"):
             pygame.display.flip()
-            self.clock.tick(FPS)
-            if maze[self.hero.y][self.hero.x] == 2:
-                Game.final_screen(self)
-                running = False
 
-            if self.hero.x == self.monster.x and self.hero.y == self.monster.y:
-                Game.end_screen(self)
-                running = False
+    def run(self):
+        # Логика идёт с частотой FPS независимо от скорости отрисовки
+        timestep = FixedTimestep(FPS)
+        running = True
+        while running:
+            with self.profiler.scope("events"):
+                running = self.handle_events()
+            for _ in timestep.steps():
+                if self.playback is not None:
+                    # запись доиграна — стоим на последнем кадре, пока её перематывают или закрывают
+                    if self.tick < len(self.playback) and self.status() is None:
+                        self.update(self.playback.keys(self.tick))
+                    continue
+                status = self.update()
+                if status:
+                    replay.save(self.recording)
+                    self.profiler.save()
+                    if not self.endless:
+                        storage.record_run(3, status, self.tick, FPS)
+                if status == "win":
+                    Game.final_screen(self)
+                    running = False
+                    break
 
+                if status == "loss":
+                    Game.end_screen(self)
+                    running = False
+                    break
+            self.draw(timestep.alpha)
+
+            self.clock.tick(RENDER_FPS)
+            self.profiler.frame()
+            if SNOW_AUTO_DENSITY:
+                self.snowstorm.adapt(self.clock.get_rawtime(), 1000 / FPS)
+
+        if self.endless:
+            self.maze.flush()
+        if self.playback is None:
+            replay.save(self.recording)
+        self.profiler.save()
         pygame.quit()
         sys.exit()
 
 
 # Запуск программы
 if __name__ == "__main__":
-    game = Game()
+    game = Game(endless="--endless" in sys.argv)
     game.run()
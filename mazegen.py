@@ -0,0 +1,228 @@
+import random
+
+import numpy as np
+
+from grid import Grid, FLOOR, WALL
+
+# Комнаты лабиринта лежат в нечётных клетках (2 * x + 1, 2 * y + 1).
+# Каждый алгоритм возвращает два списка номеров комнат (y * cols + x):
+# у каких комнат открыт проход вправо и у каких — вниз.
+
+
+def prim(cols, rows, rng):
+    visited = bytearray(cols * rows)
+    right, down = [], []
+    frontier = []
+
+    def add(room):
+        visited[room] = 1
+        x, y = room % cols, room // cols
+        if x + 1 < cols:
+            frontier.append((room, room + 1))
+        if x > 0:
+            frontier.append((room, room - 1))
+        if y + 1 < rows:
+            frontier.append((room, room + cols))
+        if y > 0:
+            frontier.append((room, room - cols))
+
+    add(0)
+    while frontier:
+        # случайный элемент забираем за O(1): меняем местами с последним
+        index = rng.randrange(len(frontier))
+        frontier[index], frontier[-1] = frontier[-1], frontier[index]
+        room, other = frontier.pop()
+        if visited[other]:
+            continue
+        link(right, down, cols, room, other)
+        add(other)
+    return right, down
+
+
+def kruskal(cols, rows, rng):
+    # Все стены между комнатами перемешиваются одним вызовом numpy
+    rooms = np.arange(cols * rows).reshape(rows, cols)
+    first = np.concatenate([rooms[:, :-1].ravel(), rooms[:-1, :].ravel()])
+    second = np.concatenate([rooms[:, 1:].ravel(), rooms[1:, :].ravel()])
+    order = np.random.default_rng(rng.getrandbits(64)).permutation(len(first))
+
+    parent = list(range(cols * rows))
+
+    def find(room):
+        while parent[room] != room:
+            parent[room] = parent[parent[room]]
+            room = parent[room]
+        return room
+
+    right, down = [], []
+    for a, b in zip(first[order].tolist(), second[order].tolist()):
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[root_a] = root_b
+            link(right, down, cols, a, b)
+    return right, down
+
+
+def backtracker(cols, rows, rng):
+    visited = bytearray(cols * rows)
+    right, down = [], []
+    visited[0] = 1
+    stack = [0]
+    while stack:
+        room = stack[-1]
+        x, y = room % cols, room // cols
+        options = []
+        if x + 1 < cols and not visited[room + 1]:
+            options.append(room + 1)
+        if x > 0 and not visited[room - 1]:
+            options.append(room - 1)
+        if y + 1 < rows and not visited[room + cols]:
+            options.append(room + cols)
+        if y > 0 and not visited[room - cols]:
+            options.append(room - cols)
+        if not options:
+            stack.pop()
+            continue
+        other = rng.choice(options)
+        link(right, down, cols, room, other)
+        visited[other] = 1
+        stack.append(other)
+    return right, down
+
+
+def wilson(cols, rows, rng):
+    # Случайные блуждания со стиранием петель: каждое доводится до уже построенного дерева
+    in_tree = bytearray(cols * rows)
+    in_tree[rng.randrange(cols * rows)] = 1
+    step = {}
+    right, down = [], []
+    order = list(range(cols * rows))
+    rng.shuffle(order)
+    for start in order:
+        room = start
+        while not in_tree[room]:
+            x, y = room % cols, room // cols
+            options = []
+            if x + 1 < cols:
+                options.append(room + 1)
+            if x > 0:
+                options.append(room - 1)
+            if y + 1 < rows:
+                options.append(room + cols)
+            if y > 0:
+                options.append(room - cols)
+            step[room] = rng.choice(options)
+            room = step[room]
+        room = start
+        while not in_tree[room]:
+            in_tree[room] = 1
+            link(right, down, cols, room, step[room])
+            room = step[room]
+    return right, down
+
+
+def eller_rows(width, height, seed=None):
+    # Алгоритм Эллера: строки отдаются по одной, в памяти только текущий ряд комнат
+    rng = random.Random(seed)
+    cols, rows = (width - 1) // 2, (height - 1) // 2
+    border = np.full(width, WALL, dtype=np.uint8)
+    yield border
+    sets = [0] * cols
+    members = {}
+    next_set = 1
+    for y in range(rows):
+        for x in range(cols):
+            if not sets[x]:
+                sets[x] = next_set
+                members[next_set] = [x]
+                next_set += 1
+
+        room_row = border.copy()
+        room_row[1:2 * cols:2] = FLOOR
+        last = y == rows - 1
+        for x in range(cols - 1):
+            if sets[x] != sets[x + 1] and (last or rng.random() < 0.5):
+                room_row[2 * x + 2] = FLOOR
+                keep, drop = sets[x], sets[x + 1]
+                if len(members[keep]) < len(members[drop]):
+                    keep, drop = drop, keep
+                for column in members.pop(drop):
+                    sets[column] = keep
+                    members[keep].append(column)
+        yield room_row
+
+        if last:
+            break
+        wall_row = border.copy()
+        new_sets = [0] * cols
+        new_members = {}
+        for label, columns in members.items():
+            chosen = [x for x in columns if rng.random() < 0.5] or [rng.choice(columns)]
+            for x in chosen:
+                wall_row[2 * x + 1] = FLOOR
+                new_sets[x] = label
+            new_members[label] = chosen
+        sets, members = new_sets, new_members
+        yield wall_row
+
+    for _ in range(height - 2 * rows):
+        yield border
+
+
+def eller(cols, rows, rng):
+    grid = np.vstack(list(eller_rows(2 * cols + 1, 2 * rows + 1, rng.getrandbits(64))))
+    ys, xs = np.nonzero(grid[1:-1:2, 2:-1:2] == FLOOR)
+    right = (ys * cols + xs).tolist()
+    ys, xs = np.nonzero(grid[2:-1:2, 1:-1:2] == FLOOR)
+    down = (ys * cols + xs).tolist()
+    return right, down
+
+
+# Потоковая запись лабиринта по Эллеру в файл: размер ограничен только диском
+def save_eller(path, width, height, seed=None):
+    with open(path, "wb") as file:
+        for row in eller_rows(width, height, seed):
+            file.write(row.tobytes())
+
+
+def load_raw(path, width):
+    cells = np.memmap(path, dtype=np.uint8, mode="r+")
+    return Grid.from_array(cells.reshape(-1, width))
+
+
+def link(right, down, cols, room, other):
+    if other == room + 1:
+        right.append(room)
+    elif other == room - 1:
+        right.append(other)
+    elif other == room + cols:
+        down.append(room)
+    else:
+        down.append(other)
+
+
+def carve(width, height, right, down):
+    cols, rows = (width - 1) // 2, (height - 1) // 2
+    cells = np.full((height, width), WALL, dtype=np.uint8)
+    cells[1:2 * rows:2, 1:2 * cols:2] = FLOOR
+    right = np.asarray(right, dtype=np.int64)
+    cells[2 * (right // cols) + 1, 2 * (right % cols) + 2] = FLOOR
+    down = np.asarray(down, dtype=np.int64)
+    cells[2 * (down // cols) + 2, 2 * (down % cols) + 1] = FLOOR
+    return Grid.from_array(cells)
+
+
+ALGORITHMS = {
+    "prim": prim,
+    "kruskal": kruskal,
+    "backtracker": backtracker,
+    "eller": eller,
+    "wilson": wilson,
+}
+
+
+# Один и тот же seed всегда даёт один и тот же лабиринт
+def generate(width, height, algorithm="prim", seed=None):
+    rng = random.Random(seed)
+    right, down = ALGORITHMS[algorithm]((width - 1) // 2, (height - 1) // 2, rng)
+    return carve(width, height, right, down)
@@ -0,0 +1,73 @@
+import numpy as np
+import pygame
+
+# Размеры снежинок и градации прозрачности, для каждой пары заранее рисуется свой спрайт
+MIN_SIZE, MAX_SIZE = 2, 6
+MIN_OPACITY, MAX_OPACITY = 50, 255
+OPACITY_BUCKETS = 8
+
+
+# Снегопад: координаты, скорости, размеры и прозрачность хранятся в массивах numpy
+# и обновляются одним векторным шагом, рисуется всё одним вызовом blits
+class Snowstorm:
+    def __init__(self, width, height, count, seed=None):
+        self.width = width
+        self.height = height
+        self.rng = np.random.default_rng(seed)
+        self.x = self.rng.uniform(0, width, count)
+        self.y = self.rng.uniform(0, height, count)
+        self.size = self.rng.integers(MIN_SIZE, MAX_SIZE + 1, count)  # Размер снежинки
+        self.speed_x = self.rng.uniform(-2, 2, count)  # Горизонтальное движение
+        self.speed_y = self.rng.uniform(1, 5, count)  # Вертикальное падение
+        self.opacity = self.rng.integers(150, 256, count)  # Прозрачность (чтобы снежинки накладывались)
+        self.active = count  # сколько снежинок рисуем сейчас (уменьшается на слабых машинах)
+        self.sprites = None
+
+    def build_sprites(self):
+        sprites = []
+        for size in range(MIN_SIZE, MAX_SIZE + 1):
+            for bucket in range(OPACITY_BUCKETS):
+                opacity = MIN_OPACITY + (MAX_OPACITY - MIN_OPACITY) * bucket // (OPACITY_BUCKETS - 1)
+                sprite = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
+                pygame.draw.circle(sprite, (255, 255, 255, opacity), (size, size), size)
+                sprites.append(sprite)
+        self.sprites = np.empty(len(sprites), dtype=object)
+        self.sprites[:] = sprites
+
+    def update(self):
+        self.x += self.speed_x  # Двигаем по X
+        self.y += self.speed_y  # Двигаем по Y
+
+        # Если снежинка вышла за экран — вернуть наверх
+        out = np.flatnonzero((self.y > self.height) | (self.x < 0) | (self.x > self.width))
+        if len(out):
+            self.x[out] = self.rng.uniform(0, self.width, len(out))
+            self.y[out] = self.rng.uniform(-50, -10, len(out))  # Начинает падать с верху
+            self.speed_x[out] = self.rng.uniform(-2, 2, len(out))  # Новый случайный горизонтальный сдвиг
+            self.speed_y[out] = self.rng.uniform(1, 5, len(out))  # Новая скорость падения
+
+    def draw(self, screen, calm_center=None, calm_radius=100):
+        if self.sprites is None:
+            self.build_sprites()
+        count = self.active
+        x, y, size, opacity = self.x[:count], self.y[:count], self.size[:count], self.opacity[:count]
+
+        # Рядом с героем снежинки прозрачнее, чтобы не закрывать обзор
+        if calm_center is not None:
+            calm = (x - calm_center[0]) ** 2 + (y - calm_center[1]) ** 2 < calm_radius ** 2
+            opacity = np.where(calm, np.maximum(MIN_OPACITY, opacity - 150), opacity)
+
+        bucket = (opacity - MIN_OPACITY) * (OPACITY_BUCKETS - 1) // (MAX_OPACITY - MIN_OPACITY)
+        sprites = self.sprites[(size - MIN_SIZE) * OPACITY_BUCKETS + bucket]
+        positions = zip((x - size).astype(int).tolist(), (y - size).astype(int).tolist())
+        # fblits (pygame-ce) берётся у той поверхности, на которой рисуем сейчас: она может меняться между кадрами
+        blits = screen.fblits if hasattr(screen, "fblits") else screen.blits
+        blits(list(zip(sprites.tolist(), positions)))
+
+    # Подстройка плотности: если кадр не укладывается в бюджет, снежинок становится меньше
+    def adapt(self, frame_ms, budget_ms):
+        total = len(self.x)
+        if frame_ms > budget_ms:
+            self.active = max(total // 10, int(self.active * 0.9))
+        elif frame_ms < budget_ms * 0.7:
+            self.active = min(total, self.active + max(1, total // 100))
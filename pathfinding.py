@@ -0,0 +1,289 @@
+import heapq
+
+import numpy as np
+
+from grid import FLOOR
+
+# Соседние клетки в том же порядке, что и в старом Monster.bfs
+DIRECTIONS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+
+
+# Сколько слоёв BFS (клеток на одном расстоянии от героя) перестройка поля проходит за один шаг логики.
+# Слой — несколько операций numpy, поэтому время шага ограничено, как бы ни был велик лабиринт.
+# Пока новое поле не готово, монстры идут по старому — к клетке, где герой был в начале перестройки.
+# Предел: поле отстаёт от героя не больше чем на (длина самого длинного пути) / REBUILD_LAYERS шагов.
+# Лабиринт main3 (39x19, до ~100 слоёв) перестраивается за один шаг, как при полном BFS;
+# 501x501 (~1200 слоёв) — за 5 шагов, по 5-7 мс на шаг вместо ~30 мс одним куском
+REBUILD_LAYERS = 256
+
+
+# Поле расстояний до героя: один обратный BFS на всех монстров,
+# шаг монстра — просто выбор соседа с меньшим расстоянием.
+# Массивы плоские, с рамкой закрытых клеток вокруг лабиринта: у любой клетки поля четыре соседа
+# без проверки границ, и BFS идёт по фронту целиком операциями numpy.
+# set_goal только запоминает клетку героя, перестраивает поле update() — раз в шаг логики
+class DistanceField:
+    def __init__(self, grid, walkable=(FLOOR,)):
+        self.width = grid.width
+        self.height = grid.height
+        self.stride = self.width + 2
+        padded = np.zeros((self.height + 2, self.stride), dtype=bool)
+        padded[1:-1, 1:-1] = grid.passable(walkable)
+        self.open = padded.ravel()
+        self.steps = np.array([1, -1, self.stride, -self.stride], dtype=np.intp)
+        # dist — готовое поле для field_goal, next_dist — буфер, в который идёт перестройка
+        self.dist = np.full(self.open.size, -1, dtype=np.int32)
+        self.next_dist = np.full(self.open.size, -1, dtype=np.int32)
+        # Буферы BFS: пройденные клетки и метки для выкидывания повторов из фронта
+        self.closed = np.empty(self.open.size, dtype=bool)
+        self.marks = np.empty(self.open.size, dtype=np.intp)
+        self.goal = None
+        self.field_goal = None
+        # незаконченная перестройка и клетка героя, под которую она идёт
+        self.search = None
+        self.search_goal = None
+        self.dirty = True
+
+    def set_goal(self, x, y):
+        if self.goal != (x, y):
+            self.goal = (x, y)
+            self.dirty = True
+
+    def index(self, x, y):
+        return (y + 1) * self.stride + x + 1
+
+    def neighbours(self, index):
+        for step in (1, -1, self.stride, -self.stride):
+            yield index + step
+
+    # BFS от goal в next_dist по слоям: весь фронт расширяется за один шаг, буферы переиспользуются.
+    # Генератор останавливается после каждого слоя
+    def layers(self, goal):
+        dist = self.next_dist
+        dist.fill(-1)
+        closed = self.closed
+        np.logical_not(self.open, out=closed)
+        start = self.index(*goal)
+        dist[start] = 0
+        closed[start] = True
+        frontier = np.array([start], dtype=np.intp)
+        d = 0
+        while frontier.size:
+            d += 1
+            candidates = (frontier[:, None] + self.steps).ravel()
+            candidates = candidates[~closed[candidates]]
+            # Клетку могли найти с двух сторон сразу: оставляем только последнее вхождение
+            order = np.arange(candidates.size)
+            self.marks[candidates] = order
+            frontier = candidates[self.marks[candidates] == order]
+            closed[frontier] = True
+            dist[frontier] = d
+            yield
+
+    # Шаг логики: продолжить перестройку под текущую клетку героя, не больше budget слоёв (None — до конца).
+    # Герой ушёл, пока поле строилось, — сначала достраиваем начатое, потом начинаем новое
+    def update(self, budget=REBUILD_LAYERS):
+        if self.search is None:
+            if not self.dirty or self.goal is None:
+                return
+            self.dirty = False
+            self.search_goal = self.goal
+            self.search = self.layers(self.goal)
+        for done, _ in enumerate(self.search, 1):
+            if budget is not None and done >= budget:
+                return
+        # обход закончен: новое поле становится текущим
+        self.dist, self.next_dist = self.next_dist, self.dist
+        self.field_goal = self.search_goal
+        self.search = None
+
+    # Полная перестройка сразу, без деления на шаги
+    def rebuild(self):
+        self.search = None
+        self.dirty = True
+        self.update(budget=None)
+
+    def open_cell(self, x, y):
+        # Стена пробита: расстояния могут только уменьшиться, распространяем их от этой клетки
+        index = self.index(x, y)
+        self.open[index] = True
+        if self.search is not None:
+            # начатый обход не знает о новой клетке — начнём его заново
+            self.search = None
+            self.dirty = True
+        if self.field_goal is None:
+            return
+        dist = self.dist
+        known = [int(dist[n]) for n in self.neighbours(index) if self.open[n] and dist[n] >= 0]
+        if not known:
+            return
+        best = min(known) + 1
+        if 0 <= dist[index] <= best:
+            return
+        dist[index] = best
+        queue = [index]
+        for current in queue:
+            d = dist[current] + 1
+            for neighbour in self.neighbours(current):
+                if self.open[neighbour] and (dist[neighbour] < 0 or dist[neighbour] > d):
+                    dist[neighbour] = d
+                    queue.append(neighbour)
+
+    def distance(self, x, y):
+        if self.field_goal is None and self.goal is not None:
+            # готового поля ещё нет — строим первое целиком
+            self.rebuild()
+        return int(self.dist[self.index(x, y)])
+
+    def next_step(self, x, y):
+        d = self.distance(x, y)
+        if d == 0:
+            return None
+        if d < 0:
+            # Клетка вне поля (монстр стоит на выходе) — шагаем к ближайшему соседу из поля
+            best = None
+            for dx, dy in DIRECTIONS:
+                nd = self.dist[self.index(x + dx, y + dy)]
+                if nd >= 0 and (best is None or nd < best[0]):
+                    best = (nd, (x + dx, y + dy))
+            return best and best[1]
+        for dx, dy in DIRECTIONS:
+            if self.dist[self.index(x + dx, y + dy)] == d - 1:
+                return x + dx, y + dy
+        return None
+
+
+def make_is_open(grid, goal, walkable):
+    width, height = grid.width, grid.height
+    passable = grid.passable(walkable).tobytes()
+
+    def is_open(x, y):
+        if (x, y) == goal:
+            return True
+        return 0 <= x < width and 0 <= y < height and passable[y * width + x]
+
+    return is_open
+
+
+# Путь возвращается без стартовой клетки, но с целью; пустой список — пути нет
+def bfs(grid, start, goal, walkable=(FLOOR,)):
+    is_open = make_is_open(grid, goal, walkable)
+    visited = {start: None}
+    queue = [start]
+    for current in queue:
+        if current == goal:
+            break
+        x, y = current
+        for dx, dy in DIRECTIONS:
+            neighbour = (x + dx, y + dy)
+            if neighbour not in visited and is_open(*neighbour):
+                visited[neighbour] = current
+                queue.append(neighbour)
+    return build_path(visited, start, goal)
+
+
+def astar(grid, start, goal, walkable=(FLOOR,)):
+    is_open = make_is_open(grid, goal, walkable)
+    gx, gy = goal
+    came_from = {start: None}
+    cost = {start: 0}
+    heap = [(abs(start[0] - gx) + abs(start[1] - gy), 0, start)]
+    while heap:
+        _, g, current = heapq.heappop(heap)
+        if current == goal:
+            break
+        if g > cost[current]:
+            continue
+        x, y = current
+        for dx, dy in DIRECTIONS:
+            neighbour = (x + dx, y + dy)
+            if is_open(*neighbour) and g + 1 < cost.get(neighbour, g + 2):
+                cost[neighbour] = g + 1
+                came_from[neighbour] = current
+                f = g + 1 + abs(neighbour[0] - gx) + abs(neighbour[1] - gy)
+                heapq.heappush(heap, (f, g + 1, neighbour))
+    return build_path(came_from, start, goal)
+
+
+# Jump Point Search для 4-связной сетки: горизонтальные прыжки идут до развилки,
+# вертикальные на каждом шаге проверяют горизонтальные
+def jps(grid, start, goal, walkable=(FLOOR,)):
+    is_open = make_is_open(grid, goal, walkable)
+
+    def jump_horizontal(x, y, dx):
+        while True:
+            x += dx
+            if not is_open(x, y):
+                return None
+            if (x, y) == goal:
+                return x, y
+            for dy in (1, -1):
+                if is_open(x, y + dy) and not is_open(x - dx, y + dy):
+                    return x, y
+
+    def jump_vertical(x, y, dy):
+        while True:
+            y += dy
+            if not is_open(x, y):
+                return None
+            if (x, y) == goal or jump_horizontal(x, y, 1) or jump_horizontal(x, y, -1):
+                return x, y
+
+    def successors(node, direction):
+        x, y = node
+        if direction is None:
+            moves = DIRECTIONS
+        elif direction[1] == 0:
+            dx = direction[0]
+            moves = [(dx, 0)] + [(0, dy) for dy in (1, -1)
+                                 if is_open(x, y + dy) and not is_open(x - dx, y + dy)]
+        else:
+            moves = [direction, (1, 0), (-1, 0)]
+        for dx, dy in moves:
+            if dy == 0:
+                point = jump_horizontal(x, y, dx)
+            else:
+                point = jump_vertical(x, y, dy)
+            if point:
+                yield point, (dx, dy)
+
+    gx, gy = goal
+    came_from = {start: None}
+    cost = {start: 0}
+    heap = [(abs(start[0] - gx) + abs(start[1] - gy), 0, start, None)]
+    while heap:
+        _, g, current, direction = heapq.heappop(heap)
+        if current == goal:
+            break
+        if g > cost[current]:
+            continue
+        for point, step in successors(current, direction):
+            new_cost = g + abs(point[0] - current[0]) + abs(point[1] - current[1])
+            if new_cost < cost.get(point, new_cost + 1):
+                cost[point] = new_cost
+                came_from[point] = current
+                f = new_cost + abs(point[0] - gx) + abs(point[1] - gy)
+                heapq.heappush(heap, (f, new_cost, point, step))
+
+    # Между точками прыжка клетки лежат на одной прямой — разворачиваем их
+    jumps = build_path(came_from, start, goal)
+    path = []
+    x, y = start
+    for px, py in jumps:
+        while (x, y) != (px, py):
+            x += (px > x) - (px < x)
+            y += (py > y) - (py < y)
+            path.append((x, y))
+    return path
+
+
+def build_path(came_from, start, goal):
+    if goal not in came_from:
+        return []
+    path = []
+    current = goal
+    while current != start:
+        path.append(current)
+        current = came_from[current]
+    path.reverse()
+    return path
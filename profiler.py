@@ -0,0 +1,147 @@
+import contextlib
+import csv
+import json
+import os
+import time
+
+import numpy as np
+import pygame
+
+# Замеры времени кадра по стадиям (отрисовка лабиринта, маски, снег, поиск пути и т.д.).
+# Выключенный профайлер на каждую стадию отдаёт один и тот же пустой контекст — почти без затрат.
+ENABLED = False
+# Клавиша, которая включает замеры вместе с оверлеем прямо в игре
+TOGGLE_KEY = pygame.K_F3
+# Сколько последних кадров учитывает оверлей и как часто он перерисовывает текст
+OVERLAY_FRAMES = 120
+OVERLAY_REFRESH = 0.5
+# Куда сохранять замеры при выходе с уровня (CSV по кадрам и JSON со сводкой)
+EXPORT_DIR = os.path.join("saves", "profile")
+
+_null = contextlib.nullcontext()
+
+
+class _Scope:
+    __slots__ = ("stages", "name", "start")
+
+    def __init__(self, stages, name):
+        self.stages = stages
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.stages[self.name] = self.stages.get(self.name, 0.0) + time.perf_counter() - self.start
+
+
+class Profiler:
+    def __init__(self, name, enabled=None):
+        self.name = name
+        self.enabled = ENABLED if enabled is None else enabled
+        self.frames = []  # (длительность кадра, {стадия: время}) в секундах
+        self.stages = {}
+        self.frame_start = None
+        self.overlay = None
+        self.overlay_time = 0.0
+        self.font = None
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.frame_start = None
+        self.stages = {}
+
+    # with profiler.scope("maze"): ... — время стадии суммируется за кадр
+    def scope(self, name):
+        if not self.enabled:
+            return _null
+        return _Scope(self.stages, name)
+
+    # Вызывается раз в кадр, после flip
+    def frame(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self.frame_start is not None:
+            self.frames.append((now - self.frame_start, self.stages))
+        self.stages = {}
+        self.frame_start = now
+
+    def summary(self, last=None):
+        frames = self.frames[-last:] if last else self.frames
+        if not frames:
+            return None
+        times = np.array([total for total, _ in frames]) * 1000
+        stages = {}
+        for _, frame_stages in frames:
+            for name, seconds in frame_stages.items():
+                stages[name] = stages.get(name, 0.0) + seconds * 1000
+        p50, p95, p99 = np.percentile(times, [50, 95, 99])
+        return {
+            "frames": len(frames),
+            "fps": 1000 / times.mean(),
+            "mean_ms": float(times.mean()),
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+            "max_ms": float(times.max()),
+            "stages_ms": {name: total / len(frames) for name, total in sorted(stages.items())},
+        }
+
+    # Оверлей в левом верхнем углу: FPS, перцентили и среднее время каждой стадии
+    def draw(self, screen):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self.overlay is None or now - self.overlay_time > OVERLAY_REFRESH:
+            self.overlay = self.render_overlay()
+            self.overlay_time = now
+        if self.overlay is not None:
+            screen.blit(self.overlay, (10, 10))
+
+    def render_overlay(self):
+        stats = self.summary(OVERLAY_FRAMES)
+        if stats is None:
+            return None
+        if self.font is None:
+            self.font = pygame.font.Font(None, 22)
+        lines = [f"FPS {stats['fps']:.0f}   кадр {stats['mean_ms']:.1f} мс",
+                 f"p50 {stats['p50_ms']:.1f}  p95 {stats['p95_ms']:.1f}  p99 {stats['p99_ms']:.1f}  "
+                 f"max {stats['max_ms']:.1f}"]
+        lines += [f"{name:<12} {ms:6.2f} мс" for name, ms in stats["stages_ms"].items()]
+        rendered = [self.font.render(line, True, (255, 255, 255)) for line in lines]
+        width = max(text.get_width() for text in rendered) + 12
+        height = sum(text.get_height() for text in rendered) + 12
+        overlay = pygame.Surface((width, height), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 170))
+        y = 6
+        for text in rendered:
+            overlay.blit(text, (6, y))
+            y += text.get_height()
+        return overlay
+
+    # path с расширением .csv — время каждого кадра по стадиям, .json — сводка и все кадры
+    def export(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        names = sorted({name for _, stages in self.frames for name in stages})
+        if path.endswith(".csv"):
+            with open(path, "w", newline="") as file:
+                writer = csv.writer(file)
+                writer.writerow(["frame", "total_ms"] + names)
+                for index, (total, stages) in enumerate(self.frames):
+                    writer.writerow([index, f"{total * 1000:.3f}"] +
+                                    [f"{stages.get(name, 0.0) * 1000:.3f}" for name in names])
+        else:
+            with open(path, "w") as file:
+                json.dump({"name": self.name, "summary": self.summary(),
+                           "frames": [{"total_ms": total * 1000,
+                                       **{name: seconds * 1000 for name, seconds in stages.items()}}
+                                      for total, stages in self.frames]}, file, indent=1)
+
+    # Сохранение замеров при выходе с уровня, если они что-то намерили
+    def save(self):
+        if not self.frames:
+            return
+        base = os.path.join(EXPORT_DIR, time.strftime(f"{self.name}-%Y%m%d-%H%M%S"))
+        self.export(base + ".csv")
+        self.export(base + ".json")
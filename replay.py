@@ -0,0 +1,186 @@
+import argparse
+import os
+import random
+import struct
+import sys
+import time
+
+import pygame
+
+# Запись и воспроизведение партий.
+# Логика уровней идёт фиксированными шагами, а весь random сеется одним seed'ом в начале уровня,
+# поэтому для точного повтора партии достаточно seed'а и нажатых клавиш на каждом шаге.
+RECORD = False
+REPLAY_DIR = os.path.join("saves", "replays")
+REPLAY_MAGIC = b"LBR1"
+# уровень, seed, seed лабиринта (-1 — стандартный), частота шагов, число шагов
+HEADER = struct.Struct("<BQqHI")
+
+# Клавиши, которые влияют на логику уровня; на каждом шаге записывается битовая маска по ним
+LEVEL_KEYS = {
+    1: (pygame.K_UP, pygame.K_DOWN, pygame.K_LEFT, pygame.K_RIGHT),
+    2: (pygame.K_UP, pygame.K_DOWN, pygame.K_LEFT, pygame.K_RIGHT),
+    3: (pygame.K_w, pygame.K_s, pygame.K_a, pygame.K_d, pygame.K_e, pygame.K_SPACE),
+}
+
+# Перемотка в окне воспроизведения, в секундах
+SEEK_STEP = 5
+
+
+# Нажатые клавиши в том же виде, что и pygame.key.get_pressed()
+class Keys:
+    def __init__(self, pressed=()):
+        self.pressed = set(pressed)
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+
+def new_seed():
+    return random.SystemRandom().getrandbits(63)
+
+
+# Записанная партия одного уровня: masks[i] — нажатые на шаге i клавиши
+class Replay:
+    def __init__(self, level, seed, tick_rate, maze_seed=None, masks=None):
+        self.level = level
+        self.seed = seed
+        self.tick_rate = tick_rate
+        self.maze_seed = maze_seed
+        self.masks = bytearray() if masks is None else masks
+
+    def __len__(self):
+        return len(self.masks)
+
+    def keys(self, tick):
+        mask = self.masks[tick] if tick < len(self.masks) else 0
+        return Keys(key for bit, key in enumerate(LEVEL_KEYS[self.level]) if mask >> bit & 1)
+
+    def record(self, keys):
+        mask = 0
+        for bit, key in enumerate(LEVEL_KEYS[self.level]):
+            if keys[key]:
+                mask |= 1 << bit
+        self.masks.append(mask)
+
+    # Маски сжимаются повторами: (маска, число повторов varint) — клавиши обычно держат долго
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        data = bytearray(REPLAY_MAGIC)
+        maze_seed = -1 if self.maze_seed is None else self.maze_seed
+        data += HEADER.pack(self.level, self.seed, maze_seed, self.tick_rate, len(self.masks))
+        tick = 0
+        while tick < len(self.masks):
+            mask, run = self.masks[tick], 1
+            while tick + run < len(self.masks) and self.masks[tick + run] == mask:
+                run += 1
+            tick += run
+            data.append(mask)
+            while run >= 0x80:
+                data.append(run & 0x7F | 0x80)
+                run >>= 7
+            data.append(run)
+        with open(path + ".tmp", "wb") as file:
+            file.write(data)
+        os.replace(path + ".tmp", path)
+
+
+def load(path):
+    with open(path, "rb") as file:
+        data = file.read()
+    if data[:4] != REPLAY_MAGIC:
+        raise ValueError(f"{path}: не файл записи")
+    level, seed, maze_seed, tick_rate, ticks = HEADER.unpack_from(data, 4)
+    masks = bytearray()
+    position = 4 + HEADER.size
+    while len(masks) < ticks:
+        mask = data[position]
+        position += 1
+        run, shift = 0, 0
+        while True:
+            byte = data[position]
+            position += 1
+            run |= (byte & 0x7F) << shift
+            shift += 7
+            if byte < 0x80:
+                break
+        masks += bytes([mask]) * run
+    return Replay(level, seed, tick_rate, None if maze_seed < 0 else maze_seed, masks)
+
+
+# Начало уровня: random сеется новым seed'ом, и если запись включена — заводится запись партии
+def begin(level, tick_rate, maze_seed=None):
+    seed = new_seed()
+    random.seed(seed)
+    return Replay(level, seed, tick_rate, maze_seed) if RECORD else None
+
+
+def save(recording):
+    if recording is not None and len(recording):
+        name = time.strftime(f"level{recording.level}-%Y%m%d-%H%M%S.rpl")
+        recording.save(os.path.join(REPLAY_DIR, name))
+
+
+# Клавиши окна воспроизведения: стрелки — перемотка на SEEK_STEP секунд, Home — в начало.
+# Возвращает шаг, на который надо перейти, или None
+def seek_key(event, tick, replay):
+    if event.type != pygame.KEYDOWN:
+        return None
+    step = SEEK_STEP * replay.tick_rate
+    if event.key == pygame.K_RIGHT:
+        return min(tick + step, len(replay))
+    if event.key == pygame.K_LEFT:
+        return max(tick - step, 0)
+    if event.key == pygame.K_HOME:
+        return 0
+    return None
+
+
+# Воспроизведение без окна с максимальной скоростью; возвращает итог и число сыгранных шагов
+def play_headless(replay):
+    import headless
+
+    random.seed(replay.seed)
+    level = headless.LEVELS[replay.level](replay.maze_seed)
+    for tick in range(len(replay)):
+        result = level.update(replay.keys(tick))
+        if result:
+            return result, tick + 1
+    return None, len(replay)
+
+
+def show(replay):
+    if replay.level == 1:
+        import level1
+
+        level1.game1(playback=replay)
+    elif replay.level == 2:
+        import main2
+
+        main2.game(playback=replay)
+    else:
+        import main3
+
+        main3.Game(maze_seed=replay.maze_seed, playback=replay).run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Воспроизведение записанной партии")
+    parser.add_argument("path")
+    parser.add_argument("--show", action="store_true", help="показать в окне (стрелки — перемотка, Home — в начало)")
+    args = parser.parse_args()
+
+    replay = load(args.path)
+    if args.show:
+        show(replay)
+        return
+    start = time.perf_counter()
+    result, ticks = play_headless(replay)
+    elapsed = time.perf_counter() - start
+    print(f"уровень {replay.level}, seed {replay.seed}: {result or 'не доиграно'} "
+          f"на шаге {ticks} из {len(replay)}, {elapsed:.3f} с ({ticks / elapsed:.0f} шагов/с)")
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    main()
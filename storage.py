@@ -0,0 +1,267 @@
+import argparse
+import atexit
+import contextlib
+import queue
+import sqlite3
+import threading
+import time
+
+# Хранилище игры (пользователи, партии, рекорды): несколько долгоживущих соединений вместо connect() на каждый вызов.
+# База в режиме WAL — чтение не ждёт записи, схема мигрирует один раз при открытии.
+DB_NAME = "task_manager.db"
+# Сколько соединений держит пул; больше потоков ждут свободное соединение
+POOL_SIZE = 4
+# Сколько мс соединение ждёт чужую запись, прежде чем выдать "database is locked"
+BUSY_TIMEOUT = 5000
+
+# Миграции по порядку: версия схемы (PRAGMA user_version) = число применённых шагов.
+# Первая повторяет старый init_db, поэтому существующая база подхватывается как есть
+MIGRATIONS = [
+    '''CREATE TABLE IF NOT EXISTS users (
+           id INTEGER PRIMARY KEY AUTOINCREMENT,
+           username TEXT UNIQUE NOT NULL,
+           password TEXT NOT NULL)''',
+    # Каждая доигранная партия: итог, время (по шагам логики, а не по часам) и звёзды
+    '''CREATE TABLE runs (
+           id INTEGER PRIMARY KEY,
+           user_id INTEGER NOT NULL REFERENCES users(id),
+           level INTEGER NOT NULL,
+           result TEXT NOT NULL,
+           seconds REAL NOT NULL,
+           stars INTEGER NOT NULL DEFAULT 0,
+           finished_at REAL NOT NULL)''',
+    "CREATE INDEX runs_by_user ON runs (user_id, level, finished_at)",
+    # Лучшее на уровне — по строке на (игрок, уровень), обновляется вместе с runs.
+    # Таблица рекордов читает только её, сколько бы партий ни набралось в runs
+    '''CREATE TABLE bests (
+           user_id INTEGER NOT NULL REFERENCES users(id),
+           level INTEGER NOT NULL,
+           runs INTEGER NOT NULL,
+           wins INTEGER NOT NULL,
+           best_seconds REAL,
+           best_stars INTEGER NOT NULL,
+           PRIMARY KEY (user_id, level)) WITHOUT ROWID''',
+    "CREATE INDEX bests_leaderboard ON bests (level, best_seconds) WHERE best_seconds IS NOT NULL",
+]
+
+# Запросы — постоянные строки: sqlite3 держит их подготовленными в кэше каждого соединения
+INSERT_USER = "INSERT INTO users (username, password) VALUES (?, ?)"
+SELECT_PASSWORD = "SELECT password FROM users WHERE username = ?"
+SELECT_USER_ID = "SELECT id FROM users WHERE username = ?"
+INSERT_RUN = "INSERT INTO runs (user_id, level, result, seconds, stars, finished_at) VALUES (?, ?, ?, ?, ?, ?)"
+# Лучшее время считается только по победам: у поражения best_seconds приходит NULL
+UPSERT_BEST = '''INSERT INTO bests (user_id, level, runs, wins, best_seconds, best_stars) VALUES (?, ?, 1, ?, ?, ?)
+                 ON CONFLICT (user_id, level) DO UPDATE SET
+                     runs = runs + 1,
+                     wins = wins + excluded.wins,
+                     best_seconds = MIN(COALESCE(best_seconds, excluded.best_seconds),
+                                        COALESCE(excluded.best_seconds, best_seconds)),
+                     best_stars = MAX(best_stars, excluded.best_stars)'''
+SELECT_LEADERBOARD = '''SELECT username, best_seconds, best_stars, wins, runs FROM bests
+                        JOIN users ON users.id = bests.user_id
+                        WHERE level = ? AND best_seconds IS NOT NULL
+                        ORDER BY best_seconds LIMIT ?'''
+SELECT_BESTS = "SELECT level, best_seconds, best_stars, wins, runs FROM bests WHERE user_id = ? ORDER BY level"
+SELECT_HISTORY = '''SELECT level, result, seconds, stars, finished_at FROM runs
+                    WHERE user_id = ? AND level = ? ORDER BY finished_at DESC LIMIT ?'''
+
+# Фоновая запись партий: пачка уходит в базу раз в FLUSH_INTERVAL секунд или по BATCH_SIZE штук
+FLUSH_INTERVAL = 1.0
+BATCH_SIZE = 500
+
+
+def connect(path):
+    # isolation_level=None: одиночные запросы идут без лишнего BEGIN, транзакции открываем сами
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT / 1000, isolation_level=None,
+                           check_same_thread=False, cached_statements=64)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # В WAL синхронизации при каждом коммите не нужно, данные не теряются при падении программы
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT}")
+    return conn
+
+
+def migrate(conn):
+    # BEGIN IMMEDIATE: если базу открывают два процесса сразу, миграцию применит только один
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for statement in MIGRATIONS[version:]:
+            conn.execute(statement)
+        conn.execute(f"PRAGMA user_version={len(MIGRATIONS)}")
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+class Store:
+    def __init__(self, path=DB_NAME, pool_size=POOL_SIZE):
+        self.path = path
+        self.pool_size = pool_size
+        self.pool = queue.LifoQueue()
+        self.opened = 0
+        self.lock = threading.Lock()
+        with self.connection() as conn:
+            migrate(conn)
+
+    # with store.connection() as conn: ... — соединение берётся из пула и возвращается обратно
+    @contextlib.contextmanager
+    def connection(self):
+        try:
+            conn = self.pool.get_nowait()
+        except queue.Empty:
+            with self.lock:
+                new = self.opened < self.pool_size
+                self.opened += new
+            if new:
+                try:
+                    conn = connect(self.path)
+                except BaseException:
+                    # соединение не открылось — место в пуле свободно, иначе следующий pool.get() ждал бы вечно
+                    with self.lock:
+                        self.opened -= 1
+                    raise
+            else:
+                conn = self.pool.get()
+        try:
+            yield conn
+        finally:
+            self.pool.put(conn)
+
+    # False — такой пользователь уже есть
+    def add_user(self, username, password_hash):
+        with self.connection() as conn:
+            try:
+                conn.execute(INSERT_USER, (username, password_hash))
+            except sqlite3.IntegrityError:
+                return False
+        return True
+
+    # None — пользователя нет
+    def password_hash(self, username):
+        with self.connection() as conn:
+            row = conn.execute(SELECT_PASSWORD, (username,)).fetchone()
+        return row[0] if row else None
+
+    def user_id(self, username):
+        with self.connection() as conn:
+            row = conn.execute(SELECT_USER_ID, (username,)).fetchone()
+        return row[0] if row else None
+
+    # Пачка партий одной транзакцией: runs = [(user_id, level, result, seconds, stars, finished_at), ...]
+    def add_runs(self, runs):
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(INSERT_RUN, runs)
+                conn.executemany(UPSERT_BEST, [(user_id, level, result == "win",
+                                                seconds if result == "win" else None, stars)
+                                               for user_id, level, result, seconds, stars, _ in runs])
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    # Рекорды уровня: [(логин, лучшее время, звёзды, победы, партии), ...] от быстрых к медленным
+    def leaderboard(self, level, limit=10):
+        with self.connection() as conn:
+            return conn.execute(SELECT_LEADERBOARD, (level, limit)).fetchall()
+
+    def bests(self, user_id):
+        with self.connection() as conn:
+            return conn.execute(SELECT_BESTS, (user_id,)).fetchall()
+
+    def history(self, user_id, level, limit=20):
+        with self.connection() as conn:
+            return conn.execute(SELECT_HISTORY, (user_id, level, limit)).fetchall()
+
+    def close(self):
+        with self.lock:
+            while self.opened:
+                self.pool.get().close()
+                self.opened -= 1
+
+
+# Партии пишутся в фоне: игровой цикл только кладёт партию в очередь,
+# поток собирает пачку и отдаёт её add_runs одной транзакцией
+class RunWriter:
+    def __init__(self, store):
+        self.store = store
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.work, name="run-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, run):
+        self.queue.put(run)
+
+    def work(self):
+        running = True
+        while running:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + FLUSH_INTERVAL
+            while len(batch) < BATCH_SIZE and batch[-1] is not None:
+                try:
+                    batch.append(self.queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            if batch[-1] is None:
+                running = False
+                batch.pop()
+            if batch:
+                try:
+                    self.store.add_runs(batch)
+                except sqlite3.Error as error:
+                    print(f"Не удалось сохранить результаты: {error}")
+
+    # Дописывает всё, что осталось в очереди, и останавливает поток
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+
+
+# Общее хранилище игры и текущий игрок. Пока никто не вошёл (запуск уровня напрямую,
+# headless.py, replay.py), record_run ничего не пишет
+_store = None
+_writer = None
+player_id = None
+
+
+def open_store():
+    global _store
+    if _store is None:
+        _store = Store(DB_NAME)
+    return _store
+
+
+def login(username):
+    global player_id
+    player_id = open_store().user_id(username)
+
+
+# Конец партии: ticks шагов логики с частотой tick_rate
+def record_run(level, result, ticks, tick_rate, stars=0):
+    global _writer
+    if player_id is None:
+        return
+    if _writer is None:
+        _writer = RunWriter(open_store())
+        atexit.register(_writer.close)
+    _writer.submit((player_id, level, result, ticks / tick_rate, stars, time.time()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Рекорды уровней")
+    parser.add_argument("--level", type=int, action="append", help="номер уровня (по умолчанию 1, 2 и 3)")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    store = open_store()
+    for level in args.level or (1, 2, 3):
+        print(f"уровень {level}:")
+        for place, (username, seconds, stars, wins, runs) in enumerate(store.leaderboard(level, args.top), 1):
+            print(f"{place:>4}. {username:<20} {seconds:8.2f} с  звёзд {stars}  побед {wins} из {runs}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import levels  # noqa: E402
+
+TMX = """<?xml version="1.0" encoding="UTF-8"?>
+<map version="1.10" orientation="orthogonal" renderorder="right-down" width="3" height="2"
+     tilewidth="16" tileheight="16" infinite="0" nextlayerid="2" nextobjectid="1">
+ <tileset firstgid="1" source="tiles.tsx"/>
+ <layer id="1" name="ground" width="3" height="2">
+  <data encoding="csv">1,2,1,
+2,0,1</data>
+ </layer>
+</map>
+"""
+
+TSX = """<?xml version="1.0" encoding="UTF-8"?>
+<tileset version="1.10" name="tiles" tilewidth="16" tileheight="16" tilecount="2" columns="0">
+ <tile id="0"><properties><property name="char" value="{first}"/></properties></tile>
+ <tile id="1"><properties><property name="char" value="p"/></properties></tile>
+</tileset>
+"""
+
+
+def same_level(first, second):
+    for name in ("chars", "tiles", "cells", "attributes"):
+        assert np.array_equal(getattr(first, name), getattr(second, name)), name
+    assert first.names == second.names
+
+
+def cache_files(tmp_path):
+    return sorted(os.listdir(tmp_path / "cache"))
+
+
+# Карта компилируется, пишется в кэш, и повторная загрузка из кэша даёт тот же уровень
+def test_cache_round_trip(monkeypatch, tmp_path):
+    monkeypatch.setattr(levels, "CACHE_DIR", str(tmp_path / "cache"))
+    path = tmp_path / "level.map"
+    path.write_text("WWWWW\nW   W\nW W\nWWWWW\n")
+
+    compiled = levels.load(str(path), levels.LEVEL2_TILES)
+    assert len(cache_files(tmp_path)) == 1
+    same_level(compiled, levels.compile_rows(levels.text_rows(str(path)), levels.LEVEL2_TILES))
+
+    # второй раз карта не разбирается, а читается из кэша
+    monkeypatch.setattr(levels, "compile_rows", None)
+    cached = levels.load(str(path), levels.LEVEL2_TILES)
+    assert isinstance(cached.chars, np.memmap)
+    same_level(cached, compiled)
+    assert cached[2] == "W W.."
+
+
+# Изменённая карта не берётся из старого кэша
+def test_cache_invalidated_by_source(monkeypatch, tmp_path):
+    monkeypatch.setattr(levels, "CACHE_DIR", str(tmp_path / "cache"))
+    path = tmp_path / "level.map"
+    path.write_text("WWW\nW W\nWWW\n")
+    levels.load(str(path), levels.LEVEL2_TILES)
+
+    path.write_text("WWW\nWWW\nWWW\n")
+    level = levels.load(str(path), levels.LEVEL2_TILES)
+    assert level[1] == "WWW"
+    assert len(cache_files(tmp_path)) == 2
+
+
+# Символы клеток карты Tiled задаются во внешнем наборе плиток: его правка тоже сбрасывает кэш
+def test_cache_invalidated_by_external_tileset(monkeypatch, tmp_path):
+    monkeypatch.setattr(levels, "CACHE_DIR", str(tmp_path / "cache"))
+    path = tmp_path / "level.tmx"
+    path.write_text(TMX)
+    (tmp_path / "tiles.tsx").write_text(TSX.format(first="b"))
+    assert list(levels.load(str(path), levels.LEVEL1_TILES)) == ["bpb", "p.b"]
+
+    (tmp_path / "tiles.tsx").write_text(TSX.format(first="z"))
+    assert list(levels.load(str(path), levels.LEVEL1_TILES)) == ["zpz", "p.z"]
+    assert len(cache_files(tmp_path)) == 2
@@ -0,0 +1,100 @@
+import os
+import random
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pygame  # noqa: E402
+
+import main2  # noqa: E402
+import replay  # noqa: E402
+
+
+# Уровень без окна, но с настоящими текстурами: дороги нет в data/, вместо неё — узорная плитка,
+# чтобы стена и дорога отличались попиксельно
+def setup_textures(monkeypatch):
+    monkeypatch.chdir(ROOT)
+    main2.init(headless=True)
+    pygame.display.init()
+    pygame.display.set_mode((main2.WIDTH, main2.HEIGHT))
+    size = (main2.TILE_SIZE, main2.TILE_SIZE)
+    monkeypatch.setattr(main2, "WALL_TEXTURE", pygame.transform.scale(pygame.image.load("data/wall_texture.png"), size))
+    road = pygame.Surface(size)
+    for x in range(size[0]):
+        for y in range(size[1]):
+            road.set_at((x, y), (x * 5, y * 5, (x + y) * 2))
+    monkeypatch.setattr(main2, "ROAD_TEXTURE", road)
+
+
+# Фон, собранный один раз, совпадает с прежней отрисовкой плитка за плиткой
+def test_render_maze_matches_per_tile_blit(monkeypatch):
+    setup_textures(monkeypatch)
+    with open("data/level2.map") as file:
+        maze = file.read().splitlines()
+
+    expected = pygame.Surface((main2.WIDTH, main2.HEIGHT)).convert()
+    expected.fill(main2.BLACK)
+    for row_index, row in enumerate(maze):
+        for col_index, cell in enumerate(row):
+            x = col_index * main2.TILE_SIZE
+            y = row_index * main2.TILE_SIZE
+            if cell == "W":
+                expected.blit(main2.WALL_TEXTURE, (x, y))
+            else:
+                expected.blit(main2.ROAD_TEXTURE, (x, y))
+
+    background = main2.render_maze()
+    assert pygame.image.tobytes(background, "RGB") == pygame.image.tobytes(expected, "RGB")
+    pygame.display.quit()
+
+
+# Прежняя проверка: спрайт на каждую стену и pygame.sprite.spritecollideany
+class WallSprites:
+    def __init__(self):
+        self.group = pygame.sprite.Group()
+        for y, x in zip(*(main2.MAZE.chars == ord("W")).nonzero()):
+            wall = pygame.sprite.Sprite()
+            wall.rect = pygame.Rect(x * main2.TILE_SIZE, y * main2.TILE_SIZE, main2.TILE_SIZE, main2.TILE_SIZE)
+            self.group.add(wall)
+
+    def collideany(self, sprite):
+        return pygame.sprite.spritecollideany(sprite, self.group)
+
+
+# Сетка стен отвечает так же, как спрайты стен, для прямоугольников в любом месте карты
+def test_wall_grid_matches_wall_sprites(monkeypatch):
+    setup_textures(monkeypatch)
+    grid = main2.WallGrid(main2.MAZE.grid, main2.TILE_SIZE)
+    sprites = WallSprites()
+    probe = pygame.sprite.Sprite()
+    for size in ((40, 40), (20, 20), (1, 1)):
+        for x in range(-size[0], main2.WIDTH + 10, 7):
+            for y in range(-size[1], main2.HEIGHT + 10, 7):
+                probe.rect = pygame.Rect((x, y), size)
+                assert grid.collideany(probe) == bool(sprites.collideany(probe)), probe.rect
+
+
+# Игрок, гуляющий по лабиринту, упирается в стены в тех же местах, что и со спрайтами стен
+def test_player_blocked_like_wall_sprites(monkeypatch):
+    setup_textures(monkeypatch)
+    grid = main2.WallGrid(main2.MAZE.grid, main2.TILE_SIZE)
+    sprites = WallSprites()
+    first = main2.Player(None, main2.TILE_SIZE, main2.TILE_SIZE)
+    second = main2.Player(None, main2.TILE_SIZE, main2.TILE_SIZE)
+    rng = random.Random(1)
+    directions = [pygame.K_UP, pygame.K_DOWN, pygame.K_LEFT, pygame.K_RIGHT]
+    blocked = 0
+    for _ in range(300):
+        keys = replay.Keys(rng.sample(directions, rng.choice((1, 1, 2))))
+        for _ in range(rng.randint(5, 30)):
+            before = first.rect.topleft
+            first.update(keys, grid)
+            second.update(keys, sprites)
+            assert first.rect == second.rect
+            blocked += first.rect.topleft == before
+    assert blocked > 100
+    assert first.rect.topleft != (main2.TILE_SIZE, main2.TILE_SIZE)
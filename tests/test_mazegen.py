@@ -0,0 +1,60 @@
+import os
+import sys
+from collections import deque
+
+import numpy as np
+import pytest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import main3  # noqa: E402
+import mazegen  # noqa: E402
+from grid import EXIT, FLOOR  # noqa: E402
+
+
+# Клетки, до которых можно дойти из start
+def reachable(grid, start):
+    passable = grid.passable()
+    seen = np.zeros(passable.shape, dtype=bool)
+    seen[start[1], start[0]] = True
+    queue = deque([start])
+    while queue:
+        x, y = queue.popleft()
+        for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if grid.in_bounds(nx, ny) and passable[ny, nx] and not seen[ny, nx]:
+                seen[ny, nx] = True
+                queue.append((nx, ny))
+    return seen
+
+
+# Один и тот же seed — один и тот же лабиринт, другой seed — другой
+@pytest.mark.parametrize("algorithm", sorted(mazegen.ALGORITHMS))
+def test_same_seed_same_maze(algorithm):
+    first = mazegen.generate(41, 31, algorithm, seed=123)
+    second = mazegen.generate(41, 31, algorithm, seed=123)
+    other = mazegen.generate(41, 31, algorithm, seed=124)
+    assert first.cells.shape == (31, 41)
+    assert np.array_equal(first.cells, second.cells)
+    assert not np.array_equal(first.cells, other.cells)
+
+
+# В сгенерированном лабиринте из начала доходим до любой клетки пола, в том числе до угла выхода
+@pytest.mark.parametrize("algorithm", sorted(mazegen.ALGORITHMS))
+def test_maze_connected(algorithm):
+    for seed in range(5):
+        grid = mazegen.generate(41, 31, algorithm, seed=seed)
+        seen = reachable(grid, (1, 1))
+        assert seen[grid.height - 2, grid.width - 2]
+        assert np.array_equal(seen, grid.cells == FLOOR)
+
+
+# Лабиринт третьего уровня (с дополнительными проходами): выход достижим из начала
+@pytest.mark.parametrize("algorithm", sorted(mazegen.ALGORITHMS))
+def test_level3_exit_reachable(algorithm):
+    maze = main3.generate_maze(41, 31, algorithm, seed=7)
+    assert maze[29, 39] == EXIT
+    assert reachable(maze, (1, 1))[29, 39]
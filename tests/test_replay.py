@@ -0,0 +1,47 @@
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pygame  # noqa: E402
+
+import headless  # noqa: E402
+import replay  # noqa: E402
+
+
+# Запись сохраняется в .rpl и читается обратно без потерь: длинные повторы, пустые шаги, seed лабиринта
+@pytest.mark.parametrize("maze_seed", [None, 12345])
+def test_rpl_round_trip(tmp_path, maze_seed):
+    recording = replay.Replay(3, 2 ** 62 + 7, 30, maze_seed)
+    for tick in range(1000):
+        if tick < 300:
+            keys = [pygame.K_d]
+        elif tick % 7 == 0:
+            keys = [pygame.K_w, pygame.K_e]
+        else:
+            keys = [pygame.K_s] if tick % 3 else []
+        recording.record(replay.Keys(keys))
+    path = str(tmp_path / "game.rpl")
+    recording.save(path)
+
+    loaded = replay.load(path)
+    assert (loaded.level, loaded.seed, loaded.tick_rate, loaded.maze_seed) == (3, 2 ** 62 + 7, 30, maze_seed)
+    assert loaded.masks == recording.masks
+    assert loaded.keys(0)[pygame.K_d] and not loaded.keys(0)[pygame.K_s]
+    assert loaded.keys(302)[pygame.K_s]
+
+
+# Партия с seed'ом и её запись, проигранная заново, дают тот же итог на том же шаге
+@pytest.mark.parametrize("level", [1, 2, 3])
+def test_replay_is_deterministic(monkeypatch, tmp_path, level):
+    monkeypatch.chdir(ROOT)
+    _, seed, result, ticks = headless.play((level, 3, "path", 3000, str(tmp_path)))
+    recording = replay.load(str(tmp_path / f"level{level}-{seed}.rpl"))
+    assert len(recording) == ticks
+    assert replay.play_headless(recording) == (None if result == "timeout" else result, ticks)
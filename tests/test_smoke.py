@@ -0,0 +1,92 @@
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pygame  # noqa: E402
+
+import main3  # noqa: E402
+import replay  # noqa: E402
+
+
+# Бесконечный режим без окна: несколько шагов логики, герой идёт вправо и вниз
+def test_endless_ticks(monkeypatch, tmp_path):
+    monkeypatch.chdir(ROOT)
+    monkeypatch.setattr(main3, "WORLD_SAVE_DIR", str(tmp_path))
+    game = main3.Game(endless=True, headless=True)
+    for tick in range(60):
+        key = pygame.K_d if tick % 2 else pygame.K_s
+        assert game.update(replay.Keys([key])) is None
+    assert game.tick == 60
+    assert not game.monsters
+
+
+# Рядом с героем нет пола: ледоруб ищется в большем радиусе, а не падает с ValueError
+def test_endless_ice_pick_without_floor_nearby(monkeypatch, tmp_path):
+    monkeypatch.chdir(ROOT)
+    monkeypatch.setattr(main3, "WORLD_SAVE_DIR", str(tmp_path))
+    monkeypatch.setattr(main3, "ICE_PICK_RADIUS", 0)
+    game = main3.Game(endless=True, headless=True)
+    game.hero.x, game.hero.y = 0, 0
+    game.ice_pick_pos = None
+    game.spawn_ice_pick()
+    x, y = game.ice_pick_pos
+    assert game.maze[y, x] == main3.FLOOR
+
+
+# Герой уходит далеко: новые чанки строятся по пути, старые выбрасываются из памяти, а при возвращении
+# строятся заново такими же; пробитая ледорубом стена переживает выброс чанка
+def test_endless_chunks_regenerate(monkeypatch, tmp_path):
+    monkeypatch.chdir(ROOT)
+    monkeypatch.setattr(main3, "WORLD_SAVE_DIR", str(tmp_path))
+    game = main3.Game(endless=True, headless=True)
+    world = game.maze
+    world.cache_size = 4
+    size = world.chunk_size
+    untouched = world.chunk(1, 0).copy()
+
+    around = [(0, 1), (2, 1), (1, 0), (1, 2)]
+    walls = [(x, y) for x, y in around if world[y, x] == main3.WALL]
+    game.has_ice_pick = True
+    game.use_ice_pick()
+    broken = [(x, y) for x, y in walls if world[y, x] == main3.FLOOR]
+    assert len(broken) == 1 and (0, 0) in world.dirty
+
+    for step in range(1, 10):
+        game.hero.x, game.hero.y = step * size * 3 + 1, step * size * 2 + 1
+        assert game.update(replay.Keys([pygame.K_d])) is None
+    assert (0, 0) not in world.chunks and (1, 0) not in world.chunks
+    assert os.path.exists(world.chunk_path(0, 0))
+
+    game.hero.x, game.hero.y = 1, 1
+    assert game.update(replay.Keys([pygame.K_d])) is None
+    assert (world.chunk(1, 0) == untouched).all()
+    x, y = broken[0]
+    assert world[y, x] == main3.FLOOR
+
+
+# Новая партия с другим лабиринтом (так же состояние строится заново при перемотке записи назад):
+# поле расстояний монстров строится по новому лабиринту и наводится на героя
+def test_restart_retargets_monster_field(monkeypatch):
+    monkeypatch.chdir(ROOT)
+    game = main3.Game(headless=True, maze_seed=1)
+    for _ in range(5):
+        game.update(replay.Keys([pygame.K_d]))
+    old_maze = game.maze
+
+    game.maze_seed = 2
+    game.init_state()
+    assert game.tick == 0
+    assert not (game.maze.cells == old_maze.cells).all()
+    game.update(replay.Keys([pygame.K_s]))
+    game.field.update(budget=None)
+    assert game.field.field_goal == (game.hero.x, game.hero.y)
+    fresh = main3.pathfinding.DistanceField(game.maze)
+    fresh.set_goal(game.hero.x, game.hero.y)
+    fresh.rebuild()
+    for monster in game.monsters:
+        assert game.field.distance(monster.x, monster.y) == fresh.distance(monster.x, monster.y)
@@ -0,0 +1,39 @@
+import os
+import sqlite3
+import sys
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import storage  # noqa: E402
+
+
+# Соединение не открылось: место в пуле освобождается, и следующий вызов снова пробует открыть,
+# а не ждёт вечно в pool.get()
+def test_failed_connect_releases_pool_slot(tmp_path):
+    store = storage.Store(str(tmp_path / "users.db"), pool_size=2)
+    errors = []
+
+    def attempts():
+        for _ in range(store.pool_size + 1):
+            try:
+                with store.connection():
+                    pass
+            except sqlite3.OperationalError:
+                errors.append(1)
+
+    with store.connection():
+        # единственное открытое соединение занято, новые открываются по несуществующему пути
+        store.path = str(tmp_path / "missing" / "users.db")
+        thread = threading.Thread(target=attempts, daemon=True)
+        thread.start()
+        thread.join(timeout=10)
+    assert not thread.is_alive(), "connection() завис после неудачного connect"
+    assert len(errors) == store.pool_size + 1
+    assert store.opened == 1
+
+    store.path = str(tmp_path / "users.db")
+    assert store.user_id("nobody") is None
+    store.close()
+
@@ -0,0 +1,38 @@
+import time
+
+# Ограничение частоты отрисовки (0 — без ограничения). Логика от него не зависит.
+RENDER_FPS = 144
+# Больше стольких шагов за кадр не делаем, иначе медленный кадр будет тянуть за собой следующие
+MAX_STEPS = 5
+
+
+# Фиксированный шаг симуляции: логика идёт с постоянной частотой tick_rate,
+# а отрисовка — сколько успевает, с интерполяцией между двумя последними шагами
+class FixedTimestep:
+    def __init__(self, tick_rate, max_steps=MAX_STEPS):
+        self.tick_rate = tick_rate
+        self.dt = 1 / tick_rate
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.last = None
+
+    # Сколько шагов логики нужно сделать перед этим кадром
+    def steps(self):
+        now = time.perf_counter()
+        if self.last is None:
+            self.last = now
+            return range(1)
+        self.accumulator += min(now - self.last, self.dt * self.max_steps)
+        self.last = now
+        count = int(self.accumulator / self.dt)
+        self.accumulator -= count * self.dt
+        return range(count)
+
+    # Доля шага, прошедшая после последнего обновления (0..1), для плавной отрисовки
+    @property
+    def alpha(self):
+        return self.accumulator / self.dt
+
+
+def lerp(start, end, alpha):
+    return start + (end - start) * alpha
@@ -0,0 +1,102 @@
+import os
+import random
+from collections import OrderedDict
+
+import numpy as np
+
+import mazegen
+from grid import FLOOR, WALL
+
+# Сторона чанка в клетках (чётная: левый и верхний край чанка — его стены)
+CHUNK_SIZE = 32
+# Сколько чанков держим в памяти
+CHUNK_CACHE_SIZE = 64
+
+
+# Бесконечный лабиринт из чанков. Каждый чанк строится из seed мира и своих координат,
+# поэтому его можно выбросить из памяти и получить заново таким же.
+# Изменённые чанки (пробитые ледорубом стены) сохраняются на диск.
+class ChunkedWorld:
+    def __init__(self, seed, chunk_size=CHUNK_SIZE, cache_size=CHUNK_CACHE_SIZE, save_dir=None):
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.cache_size = cache_size
+        self.save_dir = save_dir
+        self.chunks = OrderedDict()
+        self.dirty = set()
+
+    def rng(self, cx, cy, kind):
+        # строковый seed хэшируется random детерминированно, в отличие от hash()
+        return random.Random(f"{self.seed}:{cx}:{cy}:{kind}")
+
+    def generate_chunk(self, cx, cy):
+        size = self.chunk_size
+        rng = self.rng(cx, cy, "maze")
+        cells = mazegen.generate(size + 1, size + 1, "backtracker", rng.getrandbits(64)).cells[:size, :size].copy()
+
+        # Немного лишних проходов внутри чанка, как в обычном уровне
+        count = size * size // 20
+        cells[[rng.randrange(1, size) for _ in range(count)], [rng.randrange(1, size) for _ in range(count)]] = FLOOR
+
+        # Двери в левый и верхний соседний чанк; соседи справа и снизу сделают то же самое со своей стороны
+        cells[2 * self.rng(cx, cy, "left").randrange(size // 2) + 1, 0] = FLOOR
+        cells[0, 2 * self.rng(cx, cy, "top").randrange(size // 2) + 1] = FLOOR
+        return cells
+
+    def chunk_path(self, cx, cy):
+        return os.path.join(self.save_dir, f"{cx}_{cy}.npy")
+
+    def chunk(self, cx, cy):
+        key = (cx, cy)
+        cells = self.chunks.get(key)
+        if cells is not None:
+            self.chunks.move_to_end(key)
+            return cells
+
+        if self.save_dir and os.path.exists(self.chunk_path(cx, cy)):
+            cells = np.load(self.chunk_path(cx, cy))
+        else:
+            cells = self.generate_chunk(cx, cy)
+        self.chunks[key] = cells
+        while len(self.chunks) > self.cache_size:
+            old_key, old_cells = self.chunks.popitem(last=False)
+            if old_key in self.dirty:
+                self.save_chunk(old_key, old_cells)
+        return cells
+
+    def save_chunk(self, key, cells):
+        self.dirty.discard(key)
+        if self.save_dir:
+            os.makedirs(self.save_dir, exist_ok=True)
+            np.save(self.chunk_path(*key), cells)
+
+    def flush(self):
+        for key in list(self.dirty):
+            self.save_chunk(key, self.chunks[key])
+
+    def in_bounds(self, x, y):
+        return True
+
+    # world[y, x] — как у Grid
+    def __getitem__(self, key):
+        y, x = key
+        return self.chunk(x // self.chunk_size, y // self.chunk_size)[y % self.chunk_size, x % self.chunk_size]
+
+    def __setitem__(self, key, value):
+        y, x = key
+        cx, cy = x // self.chunk_size, y // self.chunk_size
+        self.chunk(cx, cy)[y % self.chunk_size, x % self.chunk_size] = value
+        self.dirty.add((cx, cy))
+
+    # Копия прямоугольника мира, собранная из нужных чанков
+    def window(self, x, y, width, height):
+        size = self.chunk_size
+        result = np.full((height, width), WALL, dtype=np.uint8)
+        for cy in range(y // size, (y + height - 1) // size + 1):
+            for cx in range(x // size, (x + width - 1) // size + 1):
+                cells = self.chunk(cx, cy)
+                left, top = max(x, cx * size), max(y, cy * size)
+                right, bottom = min(x + width, (cx + 1) * size), min(y + height, (cy + 1) * size)
+                result[top - y:bottom - y, left - x:right - x] = \
+                    cells[top - cy * size:bottom - cy * size, left - cx * size:right - cx * size]
+        return result